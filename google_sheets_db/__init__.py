@@ -1,7 +1,8 @@
 __version__ = "1.0.8"
 
-from google_sheets_db.field import Field, PrimaryKey
+from google_sheets_db.field import Field, PrimaryKey, ReferenceField
 from google_sheets_db.database import GoogleSheetsDB
 from google_sheets_db.base_sheet import BaseSheet
+from google_sheets_db.log_sheet import LogSheet
 
-__all__ = ["GoogleSheetsDB", "BaseSheet", "Field", "PrimaryKey", "__version__"]
+__all__ = ["GoogleSheetsDB", "BaseSheet", "LogSheet", "Field", "PrimaryKey", "ReferenceField", "__version__"]
@@ -0,0 +1,127 @@
+import re
+from typing import Any
+
+from google_sheets_db.index import HashIndex
+
+# Function -> (formula, formula with criteria)
+FORMULAS = {
+    'count': ('COUNTA({range})', 'COUNTIFS({range}, "<>", {criteria})'),
+    'sum': ('SUM({range})', 'SUMIFS({range}, {criteria})'),
+    'min': ('MIN({range})', 'MINIFS({range}, {criteria})'),
+    'max': ('MAX({range})', 'MAXIFS({range}, {criteria})'),
+    'avg': ('AVERAGE({range})', 'AVERAGEIFS({range}, {criteria})'),
+}
+
+
+def column_range(model, name: str) -> str:
+    """Returns absolute A1 range of a column from the start row to the end of the sheet"""
+    field = model._get_column_by_name(name)
+    column = model._sheet_start_column + field.order_number - 1
+    return model._absolute_range(f'{model.cell_a1(column, model._sheet_start_row)}:{model.cell_a1(column)}')
+
+
+def criterion(value: Any) -> str:
+    """Returns exact match criterion of a value, wildcards `*`, `?` and `~` are escaped"""
+    value = re.sub(r'([~*?])', r'~\1', str(value))
+    return '"={}"'.format(value.replace('"', '""'))
+
+
+def match_key(value: Any) -> Any:
+    """Normalizes a value to compare it the way criteria of *IFS functions do, ignoring case"""
+    key = HashIndex.key(value)
+    return key.casefold() if isinstance(key, str) else key
+
+
+def formula(model, function: str, name: str, where: dict[str, Any]) -> str:
+    """Returns formula of the aggregate function over a field column"""
+    plain, conditional = FORMULAS[function]
+    if not where:
+        return f'=IFERROR({plain.format(range=column_range(model, name))}, "")'
+    criteria = ', '.join(
+        '{}, {}'.format(column_range(model, field_name), criterion(value))
+        for field_name, value in where.items()
+    )
+    return f'=IFERROR({conditional.format(range=column_range(model, name), criteria=criteria)}, "")'
+
+
+def number(value: Any) -> Any:
+    if value in (None, ''):
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def aggregate_records(model, aggregates: dict[str, str], where: dict[str, Any]) -> dict[str, Any]:
+    """
+    Calculates aggregates on the client side
+
+    Used by transports which do not calculate formulas. Calls API once.
+    """
+    def cell(row, name):
+        # Raw values are used, so empty cells are not replaced with field defaults
+        order_number = model._get_column_by_name(name).order_number
+        return row[order_number - 1] if len(row) >= order_number else None
+
+    rows = [
+        row for row in model.get_table_values()
+        if all(match_key(cell(row, name)) == match_key(value) for name, value in where.items())
+    ]
+    result = {}
+    for function, name in aggregates.items():
+        values = [cell(row, name) for row in rows if cell(row, name) not in (None, '')]
+        if function == 'count':
+            result[function] = len(values)
+            continue
+        numbers = [value for value in map(number, values) if value is not None]
+        if function == 'sum':
+            result[function] = sum(numbers)
+        elif function == 'min':
+            result[function] = min(numbers) if numbers else 0
+        elif function == 'max':
+            result[function] = max(numbers) if numbers else 0
+        else:
+            result[function] = sum(numbers) / len(numbers) if numbers else None
+    return result
+
+
+def aggregate_sheet(model, where: dict[str, Any] = None, **aggregates: str) -> dict[str, Any]:
+    where = where or {}
+    for function in aggregates:
+        if function not in FORMULAS:
+            raise Exception(f"Unknown aggregate function: {function}. Use one of: {', '.join(FORMULAS)}.")
+    if model._shards:
+        return merge_shards(model, where, aggregates)
+    if not model._db.transport.supports_formulas:
+        return aggregate_records(model, aggregates, where)
+    values = model._db.evaluate([formula(model, function, name, where) for function, name in aggregates.items()])
+    return {function: number(value) for function, value in zip(aggregates, values)}
+
+
+def merge_shards(model, where: dict[str, Any], aggregates: dict[str, str]) -> dict[str, Any]:
+    """Aggregates every shard concurrently and merges the results"""
+    results = model._fan_out(lambda shard: aggregate_sheet(shard, where=where, **aggregates))
+    if 'avg' in aggregates:
+        # Average is merged as a weighted one
+        if aggregates.get('count') == aggregates['avg']:
+            counts = [result['count'] for result in results]
+        else:
+            counts = [result['count'] for result in
+                      model._fan_out(lambda shard: aggregate_sheet(shard, where=where, count=aggregates['avg']))]
+    merged = {}
+    for function in aggregates:
+        values = [result[function] for result in results if result[function] is not None]
+        if function in ('count', 'sum'):
+            merged[function] = sum(values)
+        elif function == 'min':
+            merged[function] = min(values) if values else 0
+        elif function == 'max':
+            merged[function] = max(values) if values else 0
+        else:
+            weights = [count for result, count in zip(results, counts) if result['avg'] is not None]
+            merged[function] = (sum(value * weight for value, weight in zip(values, weights)) / sum(weights)
+                                if sum(weights) else None)
+    return merged
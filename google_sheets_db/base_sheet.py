@@ -1,29 +1,46 @@
 from copy import copy, deepcopy
-from functools import cached_property
-from typing import Union, Optional, Self, Any
+from itertools import chain
+from typing import Union, Optional, Self, Any, Callable, Container, Hashable
 
 import pandas as pd
 from deprecation import deprecated
 
-from google_sheets_db import Field, __version__
+from google_sheets_db import Field, ReferenceField, __version__
+from google_sheets_db.aggregate import aggregate_sheet
 from google_sheets_db.base_sheet_metaclass import BaseSheetMetaclass
+from google_sheets_db.concurrency import run_parallel
+from google_sheets_db.explain import Plan
+from google_sheets_db.index import HashIndex
+from google_sheets_db.snapshot import export_sheet, load_sheet
+from google_sheets_db.watch import RowChanges, Watcher
 from google_sheets_db.worksheet_mixin import WorksheetMixin
 
+# Approximate size of values written by one request of insert_many
+MAX_CHUNK_BYTES = 2 * 1024 * 1024
+# Referenced rows are read one by one in a batch request up to this number, the whole table otherwise
+PREFETCH_ROWS = 100
 
 class BaseSheet(WorksheetMixin, metaclass=BaseSheetMetaclass):
     __init_named_row = None
     __init_list_row = None
-    __primary_field = None
+    __primary_fields = None
     # Columns of a sheet
     _columns: list[Field]
     meta = {}
 
     def __init__(self, *args, _index: int = None, **kwargs):
         self._data = {}
+        # Names of fields changed since the row was read or saved
+        self._dirty = set()
         self._index = _index
+        # Reference field name -> referenced instance
+        self._related = {}
         row_dict = self._prepare_row(*args, as_named=True, **kwargs)
         for field in self._columns:
             self[field.name] = row_dict.get(field.name, None)
+        # Values of a row read from the sheet are not changed
+        if _index is not None:
+            self._dirty.clear()
 
     def __repr__(self):
         return f'{self.__class__.__name__}({self.pk})'
@@ -59,29 +76,120 @@ class BaseSheet(WorksheetMixin, metaclass=BaseSheetMetaclass):
         """Just an alias for class _columns"""
         return self.__class__._columns  # noqa
 
-    @cached_property
-    def _pk_name(self) -> str:
-        return self.get_primary_field().name
+    def related(self, name: str) -> Optional['BaseSheet']:
+        """
+        Returns the instance referenced by the reference field, None for an empty key
+
+        Calls API if the instance was not prefetched.
+        """
+        if name not in self._related:
+            field = self._reference_field(name)
+            key = self._data.get(name)
+            self._related[name] = field.model.with_pk(key) if key not in (None, '') else None
+        return self._related[name]
 
     @property
-    def pk(self) -> Union[int, str]:
-        return getattr(self, self._pk_name)
+    def pk(self) -> Union[int, str, tuple]:
+        """Primary key value, a tuple of values for a composite key, None if the model has no primary key"""
+        fields = self.get_primary_fields()
+        if not fields:
+            return None
+        if len(fields) > 1:
+            return tuple(getattr(self, field.name) for field in fields)
+        return getattr(self, fields[0].name)
 
     @pk.setter
-    def pk(self, value: Union[int, str]) -> None:
-        setattr(self, self._pk_name, value)
+    def pk(self, value: Union[int, str, tuple]) -> None:
+        for name, part in self._named_pk(value).items():
+            setattr(self, name, part)
 
     def save(self) -> Self:
-        update = copy(self._data)
-        pk = self.pk
-        if pk is None:
-            pk = self.generate_pk()
-            update.pop(self._pk_name, None)
-        self.update_or_insert({self._pk_name: pk}, update=update)
-        self.pk = pk
-        # TODO init _index too
+        """
+        Inserts the row or writes its changed cells
+
+        Calls API.
+        """
+        self.save_many(self)
         return self
 
+    @classmethod
+    def save_many(cls, *instances: Self) -> list[Self]:
+        """
+        Saves instances writing only their changed cells in one batch update
+
+        New rows are inserted. Changed cells of adjacent columns and rows are written as one range.
+        Calls API.
+        """
+        if not cls._db.recording:
+            return cls._save_instances(instances)
+        # A dry run leaves the instances as they were, so they are saved for real afterwards
+        states = [(instance, copy(instance._data), copy(instance._dirty), instance._index, copy(instance._related))
+                  for instance in instances]
+        try:
+            return cls._save_instances(instances)
+        finally:
+            for instance, data, dirty, index, related in states:
+                instance._data, instance._dirty, instance._index, instance._related = data, dirty, index, related
+
+    @classmethod
+    def _save_instances(cls, instances: tuple[Self, ...]) -> list[Self]:
+        primary_fields = cls.get_primary_fields()
+        if not primary_fields:
+            raise Exception("Primary key is not specified.")
+        # Composite keys are never generated, so their instances always have a key
+        pk_name = primary_fields[0].name
+        if cls._shards:
+            by_shard = {}
+            for instance in instances:
+                if instance.pk is None:
+                    # The key is generated and reserved by the insert, so concurrent saves get different keys
+                    row = copy(instance._data)
+                    row.pop(pk_name, None)
+                    inserted = cls.insert(**row)
+                    instance._data[pk_name] = inserted.pk
+                    instance._index = inserted._index
+                    instance._dirty.clear()
+                    continue
+                by_shard.setdefault(cls._shard_for(instance.pk), []).append(instance)
+            run_parallel(lambda item: item[0].save_many(*item[1]), by_shard.items())
+            return list(instances)
+
+        changed = [instance for instance in instances if instance.pk is None or instance._dirty]
+
+        # Locate rows which were not read from the sheet with one column read
+        not_located = [instance for instance in changed if instance.pk is not None and instance._index is None]
+        if not_located and cls._has_composite_pk():
+            pk_index = cls._get_pk_index()
+            for instance in not_located:
+                indexes = pk_index.lookup(instance.pk)
+                instance._index = indexes[0] if indexes else None
+        elif not_located:
+            pk_indexes = {}
+            for i, value in enumerate(cls.get_column_values(name=pk_name)):
+                pk_indexes.setdefault(str(value), i + 1)
+            for instance in not_located:
+                instance._index = pk_indexes.get(str(instance.pk))
+
+        updates = {}
+        for instance in changed:
+            if instance.pk is None:
+                row = copy(instance._data)
+                row.pop(pk_name, None)
+                inserted = cls.insert(**row)
+                instance._data[pk_name] = inserted.pk
+                instance._index = inserted._index
+            elif instance._index is None:
+                inserted = cls.insert(generate_pk=False, **instance._data)
+                instance._index = inserted._index
+            else:
+                updates[instance._index] = {name: instance._data[name] for name in instance._dirty}
+
+        if updates:
+            cls._update_cells(updates)
+        for instance in changed:
+            instance._dirty.clear()
+        return list(instances)
+
     @classmethod
     def init_named_row(cls) -> dict[str, Any]:
         """
@@ -110,21 +218,65 @@ class BaseSheet(WorksheetMixin, metaclass=BaseSheetMetaclass):
         cls.__init_list_row = result
         return deepcopy(cls.__init_list_row)
 
+    @classmethod
+    def get_primary_fields(cls) -> list[Field]:
+        """
+        Returns primary key fields, several ones for a composite key
+
+        Composite key is declared with `PrimaryKey(order=...)` fields or `meta['primary_key'] = (names...)`.
+        """
+        if cls.__primary_fields is not None:
+            return cls.__primary_fields
+        names = cls.meta.get('primary_key')
+        if names:
+            if isinstance(names, str):
+                names = [names]
+            fields = [cls._get_column_by_name(name) for name in names]
+        else:
+            fields = [f for f in cls._columns if f.primary_key]
+            # Fields without order follow the ordered ones in columns order
+            fields.sort(key=lambda f: (getattr(f, 'order', None) is None, getattr(f, 'order', None) or 0))
+        cls.__primary_fields = fields
+        return cls.__primary_fields
+
     @classmethod
     def get_primary_field(cls, raise_exc: bool = False) -> Optional[Field]:
-        """Returns primary key name"""
-        if cls.__primary_field:
-            return cls.__primary_field
-        column = [f for f in cls._columns if f.primary_key]
-        if raise_exc and not column:
+        """Returns primary key field of a not composite key"""
+        fields = cls.get_primary_fields()
+        if raise_exc and not fields:
             raise Exception(f"Primary key is not specified.")
-        elif not column:
+        elif not fields:
             return None
-        if len(column) > 1:
-            raise Exception(f"More than one primary keys specified. "
-                            f"Library does not work with more than one primary fields yet.")
-        cls.__primary_field = column[0]
-        return cls.__primary_field
+        if len(fields) > 1:
+            raise Exception(f"Composite primary key is specified: {', '.join(f.name for f in fields)}. "
+                            f"Use get_primary_fields.")
+        return fields[0]
+
+    @classmethod
+    def _has_composite_pk(cls) -> bool:
+        return len(cls.get_primary_fields()) > 1
+
+    @classmethod
+    def _named_pk(cls, pk: Any) -> dict[str, Any]:
+        """Maps primary key value, a tuple for a composite key, to field names"""
+        fields = cls.get_primary_fields()
+        if not fields:
+            raise Exception("Primary key is not specified.")
+        if len(fields) == 1:
+            return {fields[0].name: pk}
+        if not isinstance(pk, (tuple, list)) or len(pk) != len(fields):
+            raise Exception(f"Composite primary key requires {len(fields)} values "
+                            f"({', '.join(f.name for f in fields)}): {pk}.")
+        return {field.name: part for field, part in zip(fields, pk)}
+
+    @classmethod
+    def _pk_of(cls, row: dict[str, Any]) -> Any:
+        """Returns primary key value of a named row, None if a part of a composite key is missing"""
+        fields = cls.get_primary_fields()
+        if len(fields) > 1:
+            pk = tuple(row.get(field.name) for field in fields)
+            return None if cls._pk_key(pk) is None else pk
+        return row.get(fields[0].name) if fields else None
 
     @classmethod
     def _get_column_by_name(cls, name: str) -> Field:
@@ -158,39 +310,405 @@ class BaseSheet(WorksheetMixin, metaclass=BaseSheetMetaclass):
             else:
                 column = cls._get_column_by_name(name)
             order_number = column.order_number
+        if cls._shards:
+            return list(chain(*cls._fan_out(lambda shard: shard.get_column_values(order_number=order_number))))
 
-        column_number = cls._sheet_start_column + order_number - 1
-        start = cls.cell_a1(column_number, cls._sheet_start_row)
-        end = cls.cell_a1(column_number)
-        values = cls.get_range_values(f'{start}:{end}')[0]
-        return [i[0] if i else None for i in values]
+        return cls._get_columns_values(order_number)[0]
 
     @classmethod
-    def get_table_records(cls) -> list[Self]:
+    def _get_columns_values(cls, *order_numbers: int) -> list[list[Any]]:
+        """
+        Returns all values of every column
+
+        Calls API once.
+        """
+        ranges = []
+        for order_number in order_numbers:
+            column_number = cls._sheet_start_column + order_number - 1
+            start = cls.cell_a1(column_number, cls._sheet_start_row)
+            end = cls.cell_a1(column_number)
+            ranges.append(f'{start}:{end}')
+        return [[i[0] if i else None for i in values] for values in cls.get_range_values(*ranges)]
+
+    @classmethod
+    def get_table_records(cls, max_staleness: float = None, parallel: int = None,
+                          prefetch: list[str] = None) -> list[Self]:
         """
         Returns table data as list of dicts
 
-        Calls API.
+        With `max_staleness` rows kept by a running watcher are returned
+        if they were read not earlier than that number of seconds ago.
+        With `parallel` the rows are read by that number of windows concurrently.
+        Instances referenced by `prefetch` reference fields are read at once and attached to the rows.
+        Calls API, sharded sheets are read concurrently, at most twice per prefetched field.
         """
+        if max_staleness is not None and cls._watcher:
+            records = cls._watcher.records(max_staleness=max_staleness)
+        else:
+            records = cls._read_records(parallel)
+        # Rows are decoded on worker threads, the identity map belongs to the calling one
+        identity_map = cls._identity_map
+        if identity_map is not None:
+            records = [identity_map.merge(record) for record in records]
+        if prefetch:
+            cls.prefetch(records, *prefetch)
+        return records
 
-        values = cls.get_table_values()
-        records = []
-        for row in values:
-            data = {}
-            for field in cls._columns:
-                if len(row) >= field.order_number:
-                    data[field.name] = row[field.order_number - 1]
-            records.append(cls(**data))
+    @classmethod
+    def prefetch(cls, records: list[Self], *names: str) -> list[Self]:
+        """
+        Reads instances referenced by reference fields of the records at once and attaches them
 
+        Referenced rows are joined by primary keys in memory.
+        Calls API at most twice per field.
+        """
+        for name in names:
+            field = cls._reference_field(name)
+            fetched = field.model._fetch_by_pks([record._data.get(name) for record in records])
+            for record in records:
+                record._related[name] = fetched.get(field.model._pk_key(record._data.get(name)))
         return records
 
     @classmethod
-    def get_table_values(cls) -> list[list[str]]:
+    def _reference_field(cls, name: str) -> ReferenceField:
+        field = cls._get_column_by_name(name)
+        if not isinstance(field, ReferenceField):
+            raise Exception(f"Field {name} is not a reference field. Sheet schema: {cls.__name__}")
+        return field
+
+    @classmethod
+    def _fetch_by_pks(cls, pks: list[Any]) -> dict[Hashable, Self]:
+        """
+        Returns instances by normalized primary keys
+
+        Instances kept by the identity map are not read again. Only the rows of the keys are read
+        if there are not more than PREFETCH_ROWS of them, the whole table otherwise.
+        Calls API at most twice.
+        """
+        keys = {cls._pk_key(pk) for pk in pks}
+        keys.discard(None)
+        result = {}
+        identity_map = cls._identity_map
+        if identity_map is not None:
+            for key in keys:
+                instance = identity_map.get(cls, key)
+                if instance is not None:
+                    result[key] = instance
+        keys -= set(result)
+        if not keys:
+            return result
+
+        if cls._shards or len(keys) > PREFETCH_ROWS:
+            records = cls.get_table_records()
+        elif cls._has_composite_pk():
+            pk_index = cls._get_pk_index()
+            records = cls._get_rows(sorted({pk_index.lookup(key)[0] for key in keys if pk_index.lookup(key)}))
+        else:
+            indexes = {}
+            for i, value in enumerate(cls.get_column_values(cls.get_primary_field().order_number)):
+                if cls._pk_key(value) in keys:
+                    indexes.setdefault(cls._pk_key(value), i + 1)
+            records = cls._get_rows(sorted(indexes.values()))
+        for record in records:
+            key = cls._pk_key(record.pk)
+            if key in keys:
+                result.setdefault(key, record)
+        return result
+
+    @classmethod
+    def _read_records(cls, parallel: int = None) -> list[Self]:
+        if cls._shards:
+            return list(chain(*cls._fan_out(lambda shard: shard._read_records(parallel))))
+        windows = cls._scan(lambda values, first_index: [
+            cls._new_from_row(row, _index=first_index + i) for i, row in enumerate(values)
+        ], parallel=parallel)
+        return list(chain(*windows))
+
+    @classmethod
+    def get_frame(cls, parallel: int = None) -> pd.DataFrame:
+        """
+        Returns table data as a dataframe with columns named by fields and indexed by row indexes
+
+        With `parallel` the rows are read by that number of windows concurrently.
+        Calls API, sharded sheets are read concurrently.
+        """
+        if cls._shards:
+            frames = cls._fan_out(lambda shard: shard.get_frame(parallel=parallel))
+            return pd.concat(frames, ignore_index=True)
+        frames = cls._scan(lambda values, first_index: pd.DataFrame(
+            {field.name: [row[field.order_number - 1] if len(row) >= field.order_number else None for row in values]
+             for field in cls._columns},
+            index=range(first_index, first_index + len(values)),
+        ), parallel=parallel)
+        return pd.concat(frames)
+
+    @classmethod
+    def _scan(cls, decode: Callable[[list[list[Any]], int], Any], parallel: int = None) -> list[Any]:
+        """
+        Reads table rows by `parallel` windows concurrently, decoding every window on its worker
+
+        Windows split the grid rows of cached metadata, the last one is open-ended, so rows added by others
+        are read too. `decode` gets values of a window and the index of its first row.
+        Returns decoded windows in order, trailing empty rows are dropped like a single read does.
+        Calls API once per window, requests respect the rate limit of the database.
+        """
+        parallel = max(parallel or 1, 1)
+        grid_rows = max(cls._grid_rows(), 1)
+        size = -(-grid_rows // parallel)
+        first_indexes = list(range(1, grid_rows + 1, size))
+
+        def read(i: int) -> tuple[Any, int, int]:
+            first_index = first_indexes[i]
+            last_row = cls._row_number(first_indexes[i + 1] - 1) if i + 1 < len(first_indexes) else None
+            start = cls.cell_a1(cls._sheet_start_column, cls._row_number(first_index))
+            end = cls.cell_a1(cls._sheet_start_column + cls.last_column_number, last_row)
+            values = cls.get_range_values(f'{start}:{end}')[0]
+            return decode(values, first_index), first_index, len(values)
+
+        windows = run_parallel(read, range(len(first_indexes)), max_workers=parallel)
+        # Windows without rows after the last not empty one are the end of the table
+        while len(windows) > 1 and windows[-1][2] == 0:
+            windows.pop()
+        result = []
+        for i, (decoded, first_index, length) in enumerate(windows):
+            result.append(decoded)
+            # Empty rows in the middle of the table are trimmed by the window read
+            if i + 1 < len(windows) and first_index + length < windows[i + 1][1]:
+                empty = windows[i + 1][1] - first_index - length
+                result.append(decode([[] for j in range(empty)], first_index + length))
+        return result
+
+    @classmethod
+    def aggregate(cls, where: dict[str, Any] = None, **aggregates: str) -> dict[str, Any]:
+        """
+        Calculates count, sum, min, max or avg of fields with formulas on the Google side
+
+        E.g. aggregate(count='id', sum='amount', where={'status': 'paid'}),
+        `where` values are matched exactly but ignoring case, like criteria of Google functions do.
+        Returns results by function names.
+        Calls API twice, transports without formulas support download the table once.
+        """
+        return aggregate_sheet(cls, where=where, **aggregates)
+
+    @classmethod
+    def export(cls, path: str, format: str = None, chunk_size: int = 5000) -> int:
+        """
+        Writes sheet rows to a parquet, arrow or csv file reading them by chunks
+
+        Format is guessed by the file extension, parquet by default.
+        Values are typed by field types. Returns number of rows written.
+        Calls API once per chunk.
+        """
+        return export_sheet(cls, path, format=format, chunk_size=chunk_size)
+
+    @classmethod
+    def load(cls, path: str, format: str = None, chunk_size: int = 5000, truncate: bool = False) -> int:
+        """
+        Appends rows of a parquet, arrow or csv file to the sheet by chunks
+
+        File columns are matched with fields by name. Returns number of rows written.
+        Calls API once per chunk.
+        """
+        return load_sheet(cls, path, format=format, chunk_size=chunk_size, truncate=truncate)
+
+    @classmethod
+    def watch(cls, interval: float = 60, on_change: Callable[[RowChanges], Any] = None) -> Watcher:
+        """
+        Starts background re-reading of the sheet publishing inserted, updated and deleted rows
+
+        Returns the running watcher, `on_change` is added to its callbacks.
+        Calls API every `interval` seconds.
+        """
+        watcher = cls._watcher
+        if not watcher:
+            watcher = cls._watcher = Watcher(cls, interval=interval)
+        if on_change:
+            watcher.callbacks.append(on_change)
+        return watcher.start()
+
+    @classmethod
+    def explain(cls, operation: Callable[[], Any], reads: bool = True) -> Plan:
+        """
+        Dry-runs the operation and returns its API calls with ranges, cells and full table scans
+
+        E.g. `Users.explain(lambda: Users.update_or_insert({'email': email}, {'name': name}))`.
+        Reads are sent unless `reads=False`, writes are only recorded.
+        Indexes and kept instances are changed in copies, so they are left as they were.
+        """
+        return cls._db.explain(operation, reads=reads)
+
+    @classmethod
+    def _pk_key(cls, pk: Any) -> Optional[Hashable]:
+        """Normalizes primary key value to compare keys read from the sheet with given ones"""
+        return HashIndex.key(pk)
+
+    @classmethod
+    def write_ranges(cls, data: list[dict[str, Any]]) -> Any:
+        result = super().write_ranges(data)
+        cls._invalidate_watchers()
+        return result
+
+    @classmethod
+    def insert_rows(cls, rows: list[list[Any]], row: int) -> Any:
+        result = super().insert_rows(rows, row)
+        # Rows below are shifted, so row indexes kept in memory point at other rows
+        cls.reset_indexes()
+        cls._invalidate_watchers()
+        return result
+
+    @classmethod
+    def _invalidate_watchers(cls) -> None:
+        """Makes watchers of the sheet and of the sharded model it belongs to re-read rows on next use"""
+        for model in cls.__mro__:
+            if isinstance(model, BaseSheetMetaclass) and model._watcher:
+                model._watcher.invalidate()
+
+    @classmethod
+    def _from_row(cls, row: list[Any], _index: int = None) -> Self:
+        """
+        Inits instance from a row of sheet values, the instance kept by the identity map is returned if any
+
+        No API calls.
+        """
+        instance = cls._new_from_row(row, _index=_index)
+        identity_map = cls._identity_map
+        return identity_map.merge(instance) if identity_map is not None else instance
+
+    @classmethod
+    def _new_from_row(cls, row: list[Any], _index: int = None) -> Self:
+        data = {}
+        for field in cls._columns:
+            if len(row) >= field.order_number:
+                data[field.name] = row[field.order_number - 1]
+        return cls(_index=_index, **data)
+
+    @classmethod
+    def _row_number(cls, index: int) -> int:
+        """Converts row index (1-based, relative to the start row) to a sheet row number"""
+        return cls._sheet_start_row + index - 1
+
+    @classmethod
+    def _row_range(cls, index: int) -> str:
+        """Returns A1 range of a row by its index"""
+        return cls._rows_range(index, index)
+
+    @classmethod
+    def _rows_range(cls, first_index: int, last_index: int) -> str:
+        """Returns A1 range of rows from the first index to the last one inclusive"""
+        start = cls.cell_a1(cls._sheet_start_column, cls._row_number(first_index))
+        end = cls.cell_a1(cls._sheet_start_column + cls.last_column_number, cls._row_number(last_index))
+        return f'{start}:{end}'
+
+    @classmethod
+    def _grid_rows(cls) -> int:
+        """
+        Returns number of rows of the sheet grid below the start row
+
+        Uses cached metadata, no API calls usually.
+        """
+        return max(cls._sheet.row_count - cls._sheet_start_row + 1, 0)
+
+    @classmethod
+    def _get_rows(cls, indexes: list[int]) -> list[Self]:
+        """
+        Returns instances of the rows with the specified indexes
+
+        Calls API once.
+        """
+        if not indexes:
+            return []
+        values = cls.get_range_values(*[cls._row_range(index) for index in indexes])
+        return [cls._from_row(rows[0], _index=index) for index, rows in zip(indexes, values) if rows]
+
+    @classmethod
+    def find_by(cls, **fields) -> list[Self]:
+        """
+        Returns rows with the specified field values using indexes
+
+        At least one of the fields must be indexed or all fields of a composite primary key must be given,
+        the rest are checked on the fetched rows.
+        Calls API once per not yet built index and once to fetch the rows.
+        """
+        if 'pk' in fields:
+            fields.update(cls._named_pk(fields.pop('pk')))
+        if cls._shards:
+            pk = cls._pk_of(fields)
+            if pk not in (None, ''):
+                return cls._shard_for(pk).find_by(**fields)
+            return list(chain(*cls._fan_out(lambda shard: shard.find_by(**fields))))
+        if not cls._is_indexed_lookup(fields):
+            raise Exception(f"None of the fields is indexed: {', '.join(fields)}. Sheet schema: {cls.__name__}")
+
+        indexes = None
+        if cls._has_composite_pk() and cls._pk_of(fields) is not None:
+            indexes = set(cls._get_pk_index().lookup(cls._pk_of(fields)))
+            if not indexes:
+                return []
+        indexed = {field.name: field for field in cls._indexed_fields if field.name in fields}
+        for name, field in indexed.items():
+            rows = set(cls._get_index(field).lookup(fields[name]))
+            indexes = rows if indexes is None else indexes & rows
+            if not indexes:
+                return []
+
+        records = cls._get_rows(sorted(indexes))
+        return [record for record in records
+                if all(HashIndex.key(record[name]) == HashIndex.key(value) for name, value in fields.items())]
+
+    @classmethod
+    def _is_indexed_lookup(cls, fields: dict[str, Any]) -> bool:
+        """Whether rows with the field values can be found by indexes"""
+        if any(field.name in fields for field in cls._indexed_fields):
+            return True
+        return cls._has_composite_pk() and cls._pk_of(fields) is not None
+
+    @classmethod
+    def _check_unique(cls, row: dict[str, Any], index: int = None) -> None:
+        """Raises if values of unique fields or a composite primary key are already taken by other rows"""
+        for field in cls._indexed_fields:
+            if field.unique and field.name in row:
+                cls._get_index(field).check_unique(row[field.name], index=index)
+        if cls._has_composite_pk() and any(field.name in row for field in cls.get_primary_fields()):
+            pk_index = cls._get_pk_index()
+            pk = cls._merged_pk(pk_index, row, index)
+            if [i for i in pk_index.lookup(pk) if i != index]:
+                raise Exception(f"Primary key is not unique: {pk}.")
+
+    @classmethod
+    def _update_indexes(cls, index: int, row: dict[str, Any]) -> None:
+        """Keeps already built indexes and reserved keys consistent with a written row"""
+        for field, field_index in cls._built_indexes():
+            if field.name in row:
+                field_index.set(index, row[field.name])
+        pk_index = cls._built_pk_index()
+        if pk_index is not None and any(field.name in row for field in cls.get_primary_fields()):
+            pk_index.set(index, cls._merged_pk(pk_index, row, index))
+        # Keys written by the library stay taken for inserts which read the table before
+        fields = cls.get_primary_fields()
+        if any(field.name in row for field in fields):
+            reservation = cls._reservation
+            pk = cls._merged_pk(reservation.keys, row, index) if len(fields) > 1 else row[fields[0].name]
+            reservation.set(index, cls._pk_key(pk))
+
+    @classmethod
+    def _merged_pk(cls, pk_index: HashIndex, row: dict[str, Any], index: int = None) -> tuple:
+        """Returns composite key of the row after writing fields, missing parts are taken from the index"""
+        current = pk_index.key_at(index) if index is not None else None
+        return tuple(row[field.name] if field.name in row else current[i] if current else None
+                     for i, field in enumerate(cls.get_primary_fields()))
+
+    @classmethod
+    def get_table_values(cls, parallel: int = None) -> list[list[str]]:
         """
         Returns table data as list of lists
 
-        Calls API.
+        With `parallel` the rows are read by that number of windows concurrently.
+        Calls API, sharded sheets are read concurrently.
         """
+        if cls._shards:
+            return list(chain(*cls._fan_out(lambda shard: shard.get_table_values(parallel=parallel))))
+        if parallel and parallel > 1:
+            return list(chain(*cls._scan(lambda values, first_index: values, parallel=parallel)))
         start = cls.cell_a1(cls._sheet_start_column, cls._sheet_start_row)
         end = cls.cell_a1(cls._sheet_start_column + cls.last_column_number)
         values = cls.get_range_values(f'{start}:{end}')[0]
@@ -203,6 +721,8 @@ class BaseSheet(WorksheetMixin, metaclass=BaseSheetMetaclass):
 
         Calls API.
         """
+        if cls._shards:
+            return sum(cls._fan_out(lambda shard: shard.count()))
         return len(cls.get_table_values())
 
     @classmethod
@@ -221,7 +741,7 @@ class BaseSheet(WorksheetMixin, metaclass=BaseSheetMetaclass):
         return result
 
     @classmethod
-    def convert_list_row_to_named(cls, **row) -> dict[str, Any]:
+    def convert_list_row_to_named(cls, *row) -> dict[str, Any]:
         """Converts list row to dict"""
         result = cls.init_named_row()
         for i, value in enumerate(row):
@@ -237,9 +757,8 @@ class BaseSheet(WorksheetMixin, metaclass=BaseSheetMetaclass):
 
         # if pk specified - put it in fields
         if pk and len(cls._columns) > len(fields) + len(row):
-            pk_key = cls.get_primary_field()
-            if pk_key.name not in fields:
-                fields[pk_key.name] = pk
+            for name, value in cls._named_pk(pk).items():
+                fields.setdefault(name, value)
 
         for i, column in enumerate(cls._columns):
             if not row:
@@ -257,75 +776,284 @@ class BaseSheet(WorksheetMixin, metaclass=BaseSheetMetaclass):
     @classmethod
     def generate_pk(cls, named=False) -> Union[int, dict[str, int]]:
         """
-        Generates primary key
+        Generates primary key, composite keys are not generated
 
         Calls API.
         """
-        primary_field = cls.get_primary_field()
+        primary_field = None if cls._has_composite_pk() else cls.get_primary_field()
         if not primary_field:
             return {} if named else None
         indexes = cls.get_column_values(primary_field.order_number)
-        pk = 1
-        while True:
-            if pk not in indexes and str(pk) not in indexes:
-                break
-            pk += 1
+        # Keys taken by inserts of this process are skipped too
+        pk = cls._next_pks(1, {HashIndex.key(value) for value in indexes}, cls._reservation.keys)[0]
         if named:
             return {primary_field.name: pk}
         return pk
 
+    @staticmethod
+    def _next_pks(count: int, *taken: Container) -> list[int]:
+        """Returns the smallest integer keys which are in none of the taken ones, taken keys are strings"""
+        pks = []
+        pk = 1
+        while len(pks) < count:
+            if all(str(pk) not in keys for keys in taken):
+                pks.append(pk)
+            pk += 1
+        return pks
+
+    @classmethod
+    def _table_extent(cls) -> tuple[int, set[Hashable]]:
+        """
+        Returns the number of rows up to the last not empty one and primary keys of the table
+
+        Rows with an empty key may follow the last key, so the end is found from whole rows.
+        Calls API once.
+        """
+        values = cls.get_table_values()
+        fields = cls.get_primary_fields()
+        keys = set()
+        for row in values if fields else []:
+            parts = [row[field.order_number - 1] if len(row) >= field.order_number else None for field in fields]
+            key = cls._pk_key(tuple(parts) if len(parts) > 1 else parts[0])
+            if key is not None:
+                keys.add(key)
+        return len(values), keys
+
+    @classmethod
+    def _build_unique_indexes(cls) -> None:
+        """Builds indexes checked by inserts, so they are checked without reads. Calls API once per index."""
+        for field in cls._indexed_fields:
+            if field.unique:
+                cls._get_index(field)
+        if cls._has_composite_pk():
+            cls._get_pk_index()
+
     @classmethod
     def insert(cls, *row, generate_pk=True, **fields) -> Self:
         """
         Inserts row into a table
 
-        Calls API.
+        The table is read without holding the reservation lock, so concurrent inserts read at once
+        and their writes fall into one batch. Calls API.
         """
-        primary_field = cls.get_primary_field()
-        if primary_field.name not in fields and len(row) < len(cls._columns) and generate_pk:
-            fields.update(cls.generate_pk(named=True))
-        row = cls._prepare_row(*row, **fields)
-        if primary_field and not row[primary_field.order_number - 1]:
-            row[primary_field.order_number - 1] = cls.generate_pk()
-        elif not generate_pk and primary_field and row[primary_field.order_number - 1]:
-            indexes = cls.get_column_values(primary_field.order_number)
-            if row[primary_field.order_number - 1] in indexes or str(row[primary_field.order_number - 1]) in indexes:
-                raise Exception(f"Primary key is not unique: {cls.convert_list_row_to_named(row)}.")
-
-        primary_key = row[primary_field.order_number - 1] if primary_field else None
-
-        _index = cls._sheet_start_row + cls.count()
-        start = cls.cell_a1(cls._sheet_start_column, _index)
-        end = cls.cell_a1(cls._sheet_start_column + cls.last_column_number, _index)
-        update_data = [{'range': f'{start}:{end}', 'values': [row]}]
-
-        cls._sheet.batch_update(update_data)
-        instance = cls(*row, _index=_index, pk=primary_key)
+        primary_field = None if cls._has_composite_pk() else cls.get_primary_field()
+        reservation = cls._reservation
+        if cls._shards:
+            fields = cls._prepare_row(*row, as_named=True, **fields)
+            generated = primary_field and fields.get(primary_field.name) in (None, '') and generate_pk
+            taken = {HashIndex.key(value) for value in cls.get_column_values(primary_field.order_number)} \
+                if generated else set()
+            # Rows of a sharded model only hold keys, the shard reserves the real one
+            with reservation.lock:
+                if generated:
+                    fields[primary_field.name] = cls._next_pks(1, taken, reservation.keys)[0]
+                _index = reservation.rows(1, [cls._pk_key(cls._pk_of(fields))])
+            try:
+                return cls._shard_for(cls._pk_of(fields)).insert(generate_pk=generate_pk, **fields)
+            except Exception:
+                reservation.release(_index, 1)
+                raise
+
+        rows_count, taken = cls._table_extent()
+        cls._build_unique_indexes()
+        # The row and the key are reserved, so concurrent inserts do not target the same row
+        # while their writes wait in the write batcher
+        with reservation.lock:
+            if primary_field and primary_field.name not in fields and len(row) < len(cls._columns) and generate_pk:
+                fields[primary_field.name] = cls._next_pks(1, taken, reservation.keys)[0]
+            row = cls._prepare_row(*row, **fields)
+            if primary_field and not row[primary_field.order_number - 1]:
+                row[primary_field.order_number - 1] = cls._next_pks(1, taken, reservation.keys)[0]
+            elif not generate_pk and primary_field and row[primary_field.order_number - 1]:
+                key = cls._pk_key(row[primary_field.order_number - 1])
+                if key in taken or key in reservation.keys:
+                    raise Exception(f"Primary key is not unique: {cls.convert_list_row_to_named(*row)}.")
+
+            named_row = cls.convert_list_row_to_named(*row)
+            key = cls._pk_key(cls._pk_of(named_row)) if cls.get_primary_fields() else None
+            if cls._has_composite_pk():
+                if key is None:
+                    raise Exception(f"All fields of the composite primary key are required: "
+                                    f"{', '.join(f.name for f in cls.get_primary_fields())}.")
+                if key in reservation.keys:
+                    raise Exception(f"Primary key is not unique: {cls._pk_of(named_row)}.")
+            cls._check_unique(named_row)
+            _index = reservation.rows(rows_count + 1, [key])
+        update_data = [{'range': cls._row_range(_index), 'values': [row]}]
+
+        try:
+            cls.write_ranges(update_data)
+        except Exception:
+            reservation.release(_index, 1)
+            raise
+        cls._update_indexes(_index, named_row)
+        instance = cls._from_row(row, _index=_index)
         return instance
 
     @classmethod
-    def insert_many(cls, *rows) -> int:
+    def insert_many(cls, *rows, chunk_size: int = 5000, max_workers: int = None) -> list[Self]:
         """
-        Inserts many rows to a table
+        Inserts many rows given as lists, dicts or instances
 
-        Returns next index.
+        Missing primary keys are generated for the whole batch with one read of the table,
+        the same read tells where the table ends. Rows are written below it by chunks of at most
+        `chunk_size` rows and MAX_CHUNK_BYTES of values to disjoint ranges concurrently.
+        Returns created instances with `_index` set.
+        Calls API once to read the table, once to grow the grid if needed and once per chunk.
         """
-        if len(rows) == 1 and isinstance(rows[0], list) and len(rows[0]) == 1 and isinstance(rows[0][0], list):
-            rows = rows[0]
-        columns = cls._columns
-        for row in rows:
-            if len(row) <= len(columns):
-                continue
-            raise Exception(f"Values length is greater than columns length: {rows}.")
+        rows = [cls._list_row(row) for row in cls._unwrap_rows(rows)]
+        if not rows:
+            return []
+        fields = cls.get_primary_fields()
+        position = fields[0].order_number - 1 if len(fields) == 1 else None
+        missing = [row for row in rows if row[position] in (None, '')] if position is not None else []
+
+        reservation = cls._reservation
+        if cls._shards:
+            taken = {HashIndex.key(value) for value in cls.get_column_values(fields[0].order_number)} \
+                if missing else set()
+            # Rows of a sharded model only hold keys, shards reserve the real ones
+            with reservation.lock:
+                for row, pk in zip(missing, cls._next_pks(len(missing), taken, reservation.keys)):
+                    row[position] = pk
+                keys = [cls._pk_key(cls._pk_of(cls.convert_list_row_to_named(*row))) for row in rows]
+                first_index = reservation.rows(1, keys)
+            by_shard = {}
+            for i, row in enumerate(rows):
+                shard = cls._shard_for(cls._pk_of(cls.convert_list_row_to_named(*row)))
+                by_shard.setdefault(shard, []).append((i, row))
+            try:
+                results = run_parallel(lambda item: list(zip(
+                    [i for i, row in item[1]],
+                    item[0].insert_many(*[row for i, row in item[1]], chunk_size=chunk_size, max_workers=max_workers),
+                )), by_shard.items())
+            except Exception:
+                reservation.release(first_index, len(rows))
+                raise
+            return [instance for i, instance in sorted(chain(*results), key=lambda item: item[0])]
+
+        rows_count, taken = cls._table_extent()
+        cls._build_unique_indexes()
+        # Rows and keys are reserved, so concurrent inserts do not target the same rows
+        with reservation.lock:
+            for row, pk in zip(missing, cls._next_pks(len(missing), taken, reservation.keys)):
+                row[position] = pk
+            named_rows = [cls.convert_list_row_to_named(*row) for row in rows]
+            keys = []
+            if fields:
+                for named_row in named_rows:
+                    pk = cls._pk_of(named_row)
+                    key = cls._pk_key(pk)
+                    if key is None:
+                        raise Exception(f"All fields of the primary key are required: {named_row}.")
+                    if key in taken or key in reservation.keys or key in keys:
+                        raise Exception(f"Primary key is not unique: {pk}.")
+                    keys.append(key)
+            for field in cls._indexed_fields:
+                if not field.unique:
+                    continue
+                field_index = cls._get_index(field)
+                seen = set()
+                for named_row in named_rows:
+                    value = named_row[field.name]
+                    field_index.check_unique(value)
+                    if HashIndex.key(value) in seen:
+                        raise Exception(f"Value of unique field {field.name} is not unique: {value}.")
+                    if HashIndex.key(value) is not None:
+                        seen.add(HashIndex.key(value))
+            first_index = reservation.rows(rows_count + 1, keys or [None] * len(rows))
+
+        data = []
+        index = first_index
+        for chunk in cls._chunks(rows, chunk_size):
+            data.append({'range': cls._rows_range(index, index + len(chunk) - 1), 'values': chunk})
+            index += len(chunk)
+        try:
+            # Concurrent inserts may grow the grid by more rows than needed, never by fewer
+            last_row = cls._row_number(first_index + len(rows) - 1)
+            if last_row > cls._sheet.row_count:
+                cls.add_rows(last_row - cls._sheet.row_count)
+            run_parallel(lambda item: cls.write_ranges([item]), data,
+                         max_workers=max_workers or cls.meta.get('max_workers'))
+        except Exception:
+            reservation.release(first_index, len(rows))
+            raise
+
+        instances = []
+        for i, (row, named_row) in enumerate(zip(rows, named_rows)):
+            cls._update_indexes(first_index + i, named_row)
+            instances.append(cls._from_row(row, _index=first_index + i))
+        return instances
+
+    @staticmethod
+    def _unwrap_rows(rows: tuple) -> tuple:
+        """Allows to pass rows as one list"""
+        if len(rows) == 1 and isinstance(rows[0], list) and rows[0] and \
+                all(isinstance(row, (list, tuple, dict, BaseSheet)) for row in rows[0]):
+            return tuple(rows[0])
+        return rows
 
-        index = int(cls.count()) + 1
-        cls._sheet.insert_rows(rows, row=index)
-        return index
+    @classmethod
+    def _list_row(cls, row: Union[list, tuple, dict, Self]) -> list[Any]:
+        """Converts a row given as a list, a dict or an instance to a list of values with defaults"""
+        if isinstance(row, BaseSheet):
+            return cls._prepare_row(**row._data)
+        if isinstance(row, dict):
+            return cls._prepare_row(**row)
+        if len(row) > cls.last_column_number:
+            raise Exception(f"Values length is greater than columns length: {row}.")
+        values = cls.init_list_row()
+        values[:len(row)] = row
+        return values
+
+    @staticmethod
+    def _chunks(rows: list[list[Any]], chunk_size: int) -> list[list[list[Any]]]:
+        """Splits rows into chunks of at most `chunk_size` rows and about MAX_CHUNK_BYTES of values"""
+        chunks = []
+        chunk = []
+        size = 0
+        for row in rows:
+            row_size = sum(len(str(value)) + 3 for value in row)
+            if chunk and (len(chunk) >= chunk_size or size + row_size > MAX_CHUNK_BYTES):
+                chunks.append(chunk)
+                chunk = []
+                size = 0
+            chunk.append(row)
+            size += row_size
+        if chunk:
+            chunks.append(chunk)
+        return chunks
 
     @classmethod
     def update_or_insert(cls, filtr=None, update=None, first_only=False) -> list[Self]:
         """Update row or inserts if it doesn't exist"""
 
+        if 'pk' in filtr:
+            filtr.update(cls._named_pk(filtr.pop('pk')))
+        pk = cls._pk_of(filtr)
+        if cls._shards and pk not in (None, ''):
+            return cls._shard_for(pk).update_or_insert(filtr, update=update, first_only=first_only)
+        if cls._shards:
+            rows = list(chain(*cls._fan_out(lambda shard: shard._update_matching(filtr, update, first_only))))
+        else:
+            rows = cls._update_matching(filtr, update, first_only)
+        if first_only:
+            rows = rows[:1]
+        if not rows:
+            filtr.update(update)
+            rows = [cls.insert(**filtr)]
+        return rows
+
+    @classmethod
+    def _update_matching(cls, filtr, update, first_only=False) -> list:
+        """Updates rows matching the filter"""
+        # Use indexes when possible instead of a full table scan
+        if cls._is_indexed_lookup(filtr):
+            rows = cls.find_by(**filtr)
+            if first_only:
+                rows = rows[:1]
+            return [cls.update_with_index(row._index, **update) for row in rows]
+
         # get dataframe
         values = cls.get_table_values()
         columns_names = [c.name for c in cls._columns]
@@ -333,20 +1061,17 @@ class BaseSheet(WorksheetMixin, metaclass=BaseSheetMetaclass):
             row.extend([None] * (len(columns_names) - len(row)))
         dataframe = pd.DataFrame(values, columns=columns_names)
         # filter dataframe
-        pk = cls.get_primary_field()
-        if 'pk' in filtr:
-            filtr[pk.name] = filtr.pop('pk')
         for name, value in filtr.items():
             # TODO Реализовать поиск с учетом типа поля
-            dataframe = dataframe[dataframe[name] == str(value)]
+            # Cells may be strings or native values depending on the transport, both are compared as index keys
+            key = HashIndex.key(value)
+            dataframe = dataframe[dataframe[name].map(lambda cell: HashIndex.key(cell) == key)]
         rows = []
         for i, row in dataframe.iterrows():
-            rows.append(cls.update_with_pk(row[pk.name], **update))
+            # Dataframe is indexed by the position of a row in the table
+            rows.append(cls.update_with_index(i + 1, **update))
             if first_only:
                 break
-        if not rows:
-            filtr.update(update)
-            rows = [cls.insert(**filtr)]
         return rows
 
     @classmethod
@@ -359,49 +1084,170 @@ class BaseSheet(WorksheetMixin, metaclass=BaseSheetMetaclass):
 
     @classmethod
     def get_row_index_for_pk(cls, pk) -> Optional[int]:
-        indexes = cls.get_column_values(cls.get_primary_field().order_number)
-        if pk in indexes:
-            return indexes.index(pk) + 1
-        elif str(pk) in indexes:
-            return indexes.index(str(pk)) + 1
+        if cls._shards:
+            return cls._shard_for(pk).get_row_index_for_pk(pk)
+        if cls._has_composite_pk():
+            indexes = cls._get_pk_index().lookup(tuple(cls._named_pk(pk).values()))
+            return indexes[0] if indexes else None
+        if cls.meta.get('sorted_by_pk'):
+            return cls._bisect_pk(pk)
+        key = cls._pk_key(pk)
+        if key is None:
+            return None
+        for i, value in enumerate(cls.get_column_values(cls.get_primary_field().order_number)):
+            if cls._pk_key(value) == key:
+                return i + 1
+        return None
+
+    @classmethod
+    def _bisect_pk(cls, pk) -> Optional[int]:
+        """
+        Locates the row of the primary key in a sheet sorted by it without reading the whole column
+
+        Every round reads `meta['pk_probes']` (16 by default) cells spread over the rows left in one request
+        and narrows the rows down to the gap between two probes, the last window is read as one range.
+        Empty cells are treated as the end of the table, rows past the cached grid are read by the last window.
+        Calls API about log(rows) / log(probes) times.
+        """
+        field = cls.get_primary_field(raise_exc=True)
+        target = field.to_python(pk)
+        if target is None:
+            return None
+        column = cls._sheet_start_column + field.order_number - 1
+        probes = cls.meta.get('pk_probes') or 16
+        if probes < 3:
+            raise Exception(f"pk_probes must be at least 3, got {probes}. Sheet schema: {cls.__name__}")
+        first, last = 1, cls._grid_rows()
+        # Rows may be appended by others past the cached grid, they are read while no probe bounds the search
+        bounded = False
+        while last - first + 1 > probes:
+            step = (last - first) / (probes - 1)
+            indexes = sorted({first + round(step * i) for i in range(probes)})
+            values = cls.get_range_values(*[cls.cell_a1(column, cls._row_number(i)) for i in indexes])
+            lower, upper = first, last
+            for index, value in zip(indexes, values):
+                value = field.to_python(value[0][0]) if value and value[0] else None
+                if value == target:
+                    return index
+                if value is None or value > target:
+                    upper = index - 1
+                    bounded = True
+                    break
+                lower = index + 1
+            first, last = lower, upper
+        if first > last and bounded:
+            return None
+        start = cls.cell_a1(column, cls._row_number(first))
+        end = cls.cell_a1(column, cls._row_number(last) if bounded else None)
+        for i, value in enumerate(cls.get_range_values(f'{start}:{end}')[0]):
+            if value and field.to_python(value[0]) == target:
+                return first + i
         return None
 
     @classmethod
     def with_pk(cls, pk) -> Self:
+        if cls._shards:
+            return cls._shard_for(pk).with_pk(pk)
+        identity_map = cls._identity_map
+        instance = identity_map.get(cls, pk) if identity_map is not None else None
+        if instance is not None:
+            return instance
         _index = cls.get_row_index_for_pk(pk)
         if _index is None:
             return None
 
-        row_index = cls._sheet_start_row + _index - 1
-        start = cls.cell_a1(cls._sheet_start_column, row_index)
-        end = cls.cell_a1(cls._sheet_start_column + cls.last_column_number, row_index)
-        row = cls.get_range_values(f'{start}:{end}')[0]
-
-        if not row:
-            return None
-        return cls(*row[0], _index=_index)
+        rows = cls._get_rows([_index])
+        return rows[0] if rows else None
 
     @classmethod
     def _update(cls, *row, index=None, pk=None, **fields):
         if index is None and pk is None:
             raise Exception(f"No key specified for _update method.")
+        if cls._shards:
+            if pk is None:
+                raise Exception("Rows of a sharded sheet are updated by primary key only.")
+            return cls._shard_for(pk)._update(*row, pk=pk, **fields)
 
-        instance = cls.with_pk(pk)
-        if not instance:
-            raise Exception(f"No row found for pk {pk}.")
-        # init result_row with current row values
-        sheet = cls._sheet
+        if index is None:
+            index = cls.get_row_index_for_pk(pk)
+            if index is None:
+                raise Exception(f"No row found for pk {pk}.")
 
-        result_row = []
-        # and then fill it with new values
         new_values = cls._prepare_row(*row, pk=pk, as_named=True, **fields)
-        for column in cls._columns:
-            if column.name not in new_values:
-                continue
-            while len(result_row) < column.order_number:
-                result_row.append(None)
-            result_row[column.order_number - 1] = new_values[column.name]
+        # The primary key is used to locate the row, there is no need to rewrite it
+        if pk is not None:
+            for name, value in cls._named_pk(pk).items():
+                if name in new_values and str(new_values[name]) == str(value):
+                    new_values.pop(name)
+        if not new_values:
+            return None
+        return cls._update_cells({index: new_values})
 
-        first_cell = cls.cell_a1(cls._sheet_start_column, cls._sheet_start_row + instance._index - 1)
+    @classmethod
+    def _update_cells(cls, updates: dict[int, dict[str, Any]]):
+        """
+        Writes field values to the rows with the specified indexes
+
+        Calls API once.
+        """
+        for index, row in updates.items():
+            cls._check_unique(row, index=index)
+        result = cls.write_ranges(cls._cells_ranges(updates))
+        # Kept instances do not get values of a dry run
+        identity_map = cls._identity_map if not cls._db.recording else None
+        for index, row in updates.items():
+            cls._update_indexes(index, row)
+            if identity_map is not None:
+                identity_map.apply(cls, index, row)
+        return result
+
+    @classmethod
+    def _cells_ranges(cls, updates: dict[int, dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        Coalesces field values of rows into minimal list of A1 ranges for batch update
+
+        Adjacent columns of a row are merged into one range,
+        the same columns ranges of adjacent rows are merged into one rectangle.
+        No API calls.
+        """
+        # Runs of adjacent columns: (first order number, last order number) -> list of (row index, values)
+        rectangles = []
+        open_rectangles = {}
+        for index in sorted(updates):
+            order_numbers = {cls._get_column_by_name(name).order_number: value
+                             for name, value in updates[index].items()}
+            runs = []
+            for order_number in sorted(order_numbers):
+                if runs and runs[-1][1] == order_number - 1:
+                    runs[-1][1] = order_number
+                    runs[-1][2].append(order_numbers[order_number])
+                else:
+                    runs.append([order_number, order_number, [order_numbers[order_number]]])
+            for first, last, values in runs:
+                rectangle = open_rectangles.get((first, last))
+                if rectangle and rectangle['last_index'] == index - 1:
+                    rectangle['last_index'] = index
+                    rectangle['values'].append(values)
+                    continue
+                rectangle = {'first': first, 'last': last, 'first_index': index, 'last_index': index,
+                             'values': [values]}
+                open_rectangles[(first, last)] = rectangle
+                rectangles.append(rectangle)
+
+        data = []
+        for rectangle in rectangles:
+            start = cls.cell_a1(cls._sheet_start_column + rectangle['first'] - 1,
+                                cls._row_number(rectangle['first_index']))
+            end = cls.cell_a1(cls._sheet_start_column + rectangle['last'] - 1,
+                              cls._row_number(rectangle['last_index']))
+            data.append({'range': f'{start}:{end}', 'values': rectangle['values']})
+        return data
 
-        return sheet.update(first_cell, [result_row])
+    @classmethod
+    def truncate(cls):
+        if cls._shards:
+            return cls._fan_out(lambda shard: shard.truncate())
+        result = super().truncate()
+        cls.reset_indexes()
+        cls._invalidate_watchers()
+        return result
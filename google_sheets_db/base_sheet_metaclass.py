@@ -1,12 +1,17 @@
 import inspect
 import types
 from functools import lru_cache
-from itertools import chain
+from itertools import chain, zip_longest
+from threading import RLock
+from typing import Any, Callable, Optional
 
-from gspread.models import Spreadsheet, Worksheet
+from gspread.models import Worksheet
 from gspread.utils import rowcol_to_a1
 
 from google_sheets_db import Field, GoogleSheetsDB
+from google_sheets_db.concurrency import Reservation, run_parallel
+from google_sheets_db.index import HashIndex
+from google_sheets_db.sharding import HashPartitioner
 
 
 class BaseSheetMetaclass(type):
@@ -16,20 +21,15 @@ class BaseSheetMetaclass(type):
 
     def __init__(self, name, bases, attrs):
         super().__init__(name, bases, attrs)
-        self.__sheet = None
+        self.__indexes = {}
+        self.__watcher = None
+        self.__log_segments = {}
+        self.__log_lock = RLock()
+        self.__reservation = Reservation()
 
     @property
-    @lru_cache
-    def _db(cls) -> Spreadsheet:
-        if cls.meta.get('spreadsheet_id'):
-            spreadsheets = [s for s in GoogleSheetsDB.spreadsheets if s.spreadsheet_id == cls.meta['spreadsheet_id']]
-            if not spreadsheets:
-                raise Exception(f"Spreadsheet {cls.meta['spreadsheet_id']} is not declared.")
-        elif GoogleSheetsDB.spreadsheets:
-            spreadsheets = GoogleSheetsDB.spreadsheets
-        else:
-            raise Exception("No spreadsheet specified.")
-        return spreadsheets[0]
+    def _db(cls) -> GoogleSheetsDB:
+        return GoogleSheetsDB.get(cls.meta.get('spreadsheet_id'))
 
     @property
     @lru_cache
@@ -48,11 +48,58 @@ class BaseSheetMetaclass(type):
 
     @property
     def _sheet(cls) -> Worksheet:
-        if cls.__sheet:
-            return cls.__sheet
+        # Resolved through the cached metadata every time, so `db.refresh()` reaches the model
+        return cls._db.get_sheet_by_name(cls._sheet_name)
+
+    @property
+    def _identity_map(cls):
+        """Identity map of the current scope, None if it is not enabled or no database is declared"""
+        if not GoogleSheetsDB.spreadsheets:
+            return None
+        return cls._db.identity_map
+
+    @property
+    def _log_segments(cls) -> dict:
+        """Worksheet title -> segment of a log sheet"""
+        return cls.__log_segments
+
+    @property
+    def _log_lock(cls) -> RLock:
+        """Serializes rollovers of a log sheet"""
+        return cls.__log_lock
+
+    @property
+    def _reservation(cls) -> Reservation:
+        """Rows and primary keys taken by inserts of this process, their copy within a dry run"""
+        recorder = cls._recorder
+        if recorder is not None:
+            return recorder.state(cls, 'reservation', cls.__reservation.copy)
+        return cls.__reservation
+
+    @property
+    def _indexes(cls) -> dict[str, HashIndex]:
+        """Indexes by field name, 'pk' for a composite primary key, their copies within a dry run"""
+        recorder = cls._recorder
+        if recorder is not None:
+            return recorder.state(cls, 'indexes',
+                                  lambda: {name: index.copy() for name, index in cls.__indexes.items()})
+        return cls.__indexes
+
+    @property
+    def _recorder(cls):
+        """Recording transport of a dry run of the database in the current context"""
+        if not GoogleSheetsDB.spreadsheets:
+            return None
+        return cls._db._recorder
+
+    @property
+    def _watcher(cls):
+        """Running change watcher of the sheet"""
+        return cls.__watcher
 
-        cls.__sheet = cls._db.get_sheet_by_name(cls._sheet_name)
-        return cls.__sheet
+    @_watcher.setter
+    def _watcher(cls, watcher) -> None:
+        cls.__watcher = watcher
 
     def cell_a1(cls, column: int, row: int = None) -> str:
         """
@@ -63,16 +110,110 @@ class BaseSheetMetaclass(type):
         a1 = rowcol_to_a1(row or 1, column)
         return a1 if row else a1[:-1]
 
+    @property
+    @lru_cache
+    def _shards(cls) -> list['BaseSheetMetaclass']:
+        """
+        Returns models of shards of a sharded sheet, empty list for a plain sheet
+
+        Shards are declared in meta as a list of sheet names of the same spreadsheet
+        or dicts with `spreadsheet_id` and `sheet_name`.
+        Every shard is a subclass of the model with the same fields.
+        """
+        shards = []
+        base_meta = {key: value for key, value in cls.meta.items() if key not in ('shards', 'partitioner')}
+        base_meta['sheet_name'] = cls._sheet_name
+        for spec in cls.meta.get('shards') or []:
+            if isinstance(spec, str):
+                spec = {'sheet_name': spec}
+            attrs = {field.name: field for field in cls._columns}
+            attrs['meta'] = {**base_meta, **spec}
+            attrs['__module__'] = cls.__module__
+            attrs['__qualname__'] = cls.__qualname__
+            shards.append(type(cls)(cls.__name__, (cls,), attrs))
+        return shards
+
+    @property
+    @lru_cache
+    def _partitioner(cls):
+        return cls.meta.get('partitioner') or HashPartitioner()
+
+    def _shard_for(cls, pk: Any) -> 'BaseSheetMetaclass':
+        """Returns shard model holding the primary key"""
+        key = cls._pk_key(pk)
+        if key is None:
+            raise Exception(f"Primary key is required to route a row to a shard. Sheet schema: {cls.__name__}")
+        # Parts of composite keys are routed as strings, so typed and read keys get the same shard
+        return cls._shards[cls._partitioner.shard_for(key if isinstance(key, tuple) else pk, len(cls._shards))]
+
+    def _fan_out(cls, func: Callable[['BaseSheetMetaclass'], Any]) -> list[Any]:
+        """Calls func for every shard concurrently, returns results in shards order"""
+        return run_parallel(func, cls._shards, max_workers=cls.meta.get('max_workers'))
+
     def exists(self) -> bool:
+        if self._shards:
+            return all(self._fan_out(lambda shard: shard.exists()))
         return self._db.sheet_exists(name=self._sheet_name)
 
     def create_sheet_if_not_exists(self) -> Worksheet:
-        self.__sheet = self._db.create_sheet_if_not_exists(name=self._sheet_name)
-        return self._sheet
+        if self._shards:
+            return self._fan_out(lambda shard: shard.create_sheet_if_not_exists())
+        return self._db.create_sheet_if_not_exists(name=self._sheet_name)
 
     def drop(self):
+        if self._shards:
+            self._fan_out(lambda shard: shard.drop())
+            return
         self._db.drop_sheet(self._sheet)
-        self.__sheet = None
+        self.reset_indexes()
+
+    def _get_index(cls, field: Field) -> HashIndex:
+        """
+        Returns index of the field, builds it on first use
+
+        Calls API once per index.
+        """
+        index = cls._indexes.get(field.name)
+        if index is None:
+            index = cls._indexes.setdefault(field.name, HashIndex(field.name, unique=field.unique))
+        if not index.built:
+            index.build(cls.get_column_values(order_number=field.order_number))
+        return index
+
+    def _get_pk_index(cls) -> HashIndex:
+        """
+        Returns tuple-keyed index of a composite primary key, builds it on first use
+
+        Calls API once to build it.
+        """
+        fields = cls.get_primary_fields()
+        index = cls._indexes.get('pk')
+        if index is None:
+            index = cls._indexes.setdefault('pk', HashIndex(', '.join(field.name for field in fields), unique=True))
+        if not index.built:
+            columns = cls._get_columns_values(*[field.order_number for field in fields])
+            index.build(zip_longest(*columns))
+        return index
+
+    def _built_pk_index(cls) -> Optional[HashIndex]:
+        """Returns index of a composite primary key if it is already built"""
+        index = cls._indexes.get('pk')
+        return index if index is not None and index.built else None
+
+    def _built_indexes(cls) -> list[tuple[Field, HashIndex]]:
+        """Returns indexes which are already built, so can be maintained without API calls"""
+        return [(field, cls._indexes[field.name]) for field in cls._indexed_fields
+                if field.name in cls._indexes and cls._indexes[field.name].built]
+
+    def reset_indexes(cls) -> None:
+        """Forgets all indexes, they will be rebuilt on next use, reserved rows and instances kept by the identity map"""
+        for index in cls._indexes.values():
+            index.clear()
+        cls._reservation.reset()
+        if cls._identity_map is not None:
+            cls._identity_map.forget(cls)
+        for shard in cls._shards:
+            shard.reset_indexes()
 
     @property
     @lru_cache
@@ -119,6 +260,11 @@ class BaseSheetMetaclass(type):
         # Sort by order number
         return sorted(columns, key=lambda x: x.order_number)
 
+    @property
+    @lru_cache
+    def _indexed_fields(cls) -> list[Field]:
+        return [field for field in cls._columns if field.index]
+
     @property
     @lru_cache
     def last_column_number(cls) -> int:
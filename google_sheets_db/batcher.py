@@ -0,0 +1,93 @@
+import time
+from concurrent.futures import Future
+from itertools import chain
+from queue import Queue, Empty
+from threading import Lock, Thread
+from typing import Any, Callable
+
+
+class WriteBatcher:
+    """
+    Merges writes submitted from any thread into one request
+
+    A background flusher takes the first waiting write and everything submitted within `window` seconds
+    after it, up to `max_rows` rows, and sends them as one batch update.
+    Every caller gets a future resolved with the result of the merged request.
+    """
+
+    def __init__(self, send: Callable[[list[dict[str, Any]]], Any], window: float = 0.01, max_rows: int = 1000):
+        self.send = send
+        self.window = window
+        self.max_rows = max_rows
+        self._queue = Queue()
+        self._lock = Lock()
+        self._thread = None
+        self._stopped = False
+
+    def __repr__(self):
+        return f'WriteBatcher(window={self.window}, max_rows={self.max_rows})'
+
+    def submit(self, data: list[dict[str, Any]]) -> Future:
+        """Enqueues a write, data is a list of `{'range': ..., 'values': [[...]]}` with absolute ranges"""
+        future = Future()
+        with self._lock:
+            if self._stopped:
+                raise Exception("Write batcher is closed.")
+            if not self._thread:
+                self._thread = Thread(target=self._run, name=repr(self), daemon=True)
+                self._thread.start()
+            self._queue.put((data, future))
+        return future
+
+    def flush(self) -> None:
+        """Waits until writes submitted before are sent"""
+        if self._thread:
+            self.submit([]).result()
+
+    def close(self) -> None:
+        """Sends waiting writes and stops the flusher"""
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            if self._thread:
+                self._queue.put(None)
+        if self._thread:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            rows = sum(len(value_range['values']) for value_range in item[0])
+            deadline = time.monotonic() + self.window
+            stop = False
+            while rows < self.max_rows:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+                rows += sum(len(value_range['values']) for value_range in item[0])
+            self._flush(batch)
+            if stop:
+                return
+
+    def _flush(self, batch: list[tuple[list[dict[str, Any]], Future]]) -> None:
+        data = list(chain(*[data for data, future in batch]))
+        try:
+            result = self.send(data) if data else None
+        except Exception as exc:
+            for data, future in batch:
+                future.set_exception(exc)
+        else:
+            for data, future in batch:
+                future.set_result(result)
@@ -0,0 +1,110 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from threading import Lock, RLock
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+from google_sheets_db.index import HashIndex
+
+# Threads of a pool unless `max_workers` is given
+MAX_WORKERS = 8
+
+
+def run_parallel(func: Callable[[Any], Any], items: Iterable[Any], max_workers: int = None) -> list[Any]:
+    """
+    Calls func for every item on a thread pool
+
+    Returns results in the items order, the first raised exception is re-raised.
+    At most `max_workers` (MAX_WORKERS by default) items are processed at once.
+    Context variables of the caller are seen by the workers.
+    """
+    items = list(items)
+    if len(items) <= 1 or max_workers == 1:
+        return [func(item) for item in items]
+    # Items are processed in copies of the caller context, so a dry run of `explain` reaches the workers
+    context = copy_context()
+    with ThreadPoolExecutor(max_workers=min(max_workers or MAX_WORKERS, len(items))) as executor:
+        return list(executor.map(lambda item: context.copy().run(func, item), items))
+
+
+class RateLimiter:
+    """Allows at most `rate` calls within any `period` seconds, callers above the rate wait"""
+
+    def __init__(self, rate: int, period: float = 60):
+        self.rate = rate
+        self.period = period
+        self._calls = deque()
+        self._lock = Lock()
+
+    def __repr__(self):
+        return f'RateLimiter({self.rate}/{self.period}s)'
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= self.period:
+                    self._calls.popleft()
+                if len(self._calls) < self.rate:
+                    self._calls.append(now)
+                    return
+                wait = self.period - (now - self._calls[0])
+            time.sleep(wait)
+
+
+class Reservation:
+    """
+    Rows and primary keys taken by inserts of this process
+
+    Inserts read the table without holding `lock` and take it only to pick rows and keys
+    which are not taken by the read or by other inserts, so concurrent ones get different rows and keys
+    and their writes can be sent in one batch. Rows and keys stay taken after the writes landed,
+    since a read started earlier does not see them.
+    """
+
+    def __init__(self):
+        self.lock = RLock()
+        self.next_index = 1
+        # Primary keys of the rows taken
+        self.keys = HashIndex('pk', unique=True)
+
+    def __repr__(self):
+        return f'Reservation(next_index={self.next_index}, keys={len(self.keys)})'
+
+    def copy(self) -> 'Reservation':
+        """Returns a reservation of the same rows and keys which changes do not reach this one"""
+        with self.lock:
+            reservation = Reservation()
+            reservation.next_index = self.next_index
+            reservation.keys = self.keys.copy()
+            return reservation
+
+    def rows(self, first_index: int, keys: list[Optional[Hashable]]) -> int:
+        """Reserves a row per key not before `first_index`, returns the first reserved index"""
+        with self.lock:
+            first_index = max(first_index, self.next_index)
+            for i, key in enumerate(keys):
+                self.keys.set(first_index + i, key)
+            self.next_index = first_index + len(keys)
+            return first_index
+
+    def set(self, index: int, key: Optional[Hashable]) -> None:
+        """Takes the key by the row written by the library, e.g. after its key was updated"""
+        with self.lock:
+            self.keys.set(index, key)
+            self.next_index = max(self.next_index, index + 1)
+
+    def release(self, first_index: int, count: int) -> None:
+        """Gives back rows and keys of a failed insert, rows only if nothing was reserved after them"""
+        with self.lock:
+            for index in range(first_index, first_index + count):
+                self.keys.discard(index)
+            if self.next_index == first_index + count:
+                self.next_index = first_index
+
+    def reset(self) -> None:
+        """Forgets taken rows and keys, e.g. after the sheet was truncated"""
+        with self.lock:
+            self.next_index = 1
+            self.keys.clear()
@@ -1,21 +1,40 @@
 import os
 import pickle
+from contextlib import contextmanager
+from contextvars import ContextVar
 from os.path import split
+from threading import Lock, RLock, local
+from typing import Any, Callable, Iterator, Optional
 
 import gspread
 from google.auth.transport.requests import Request
+from gspread.utils import absolute_range_name, rowcol_to_a1
 from oauth2client.service_account import ServiceAccountCredentials
 
+from google_sheets_db.batcher import WriteBatcher
+from google_sheets_db.concurrency import RateLimiter
+from google_sheets_db.explain import Plan, RecordingTransport
+from google_sheets_db.identity_map import IdentityMap
+from google_sheets_db.journal import Journal
+from google_sheets_db.transport import Transport, GspreadTransport, ValuesApiTransport
+
+# Database -> recording transport of the dry runs of `explain` in the current context
+_recorders: ContextVar[dict] = ContextVar('recorders', default={})
+
 
 class SpreadSheetDescriptor:
 
     def __get__(self, instance, owner):
-        """Descriptor for retrieving a spreadsheet value."""
-        if instance.__spreadsheet:
-            return instance.__spreadsheet
-
-        # Otherwise raise an exception
-        raise Exception("Spreadsheet is closed.")
+        """Descriptor for retrieving a spreadsheet value, connects on first use."""
+        if instance is None:
+            return self
+        if instance.closed:
+            raise Exception("Spreadsheet is closed.")
+        if not instance.__spreadsheet:
+            with instance._lock:
+                if not instance.__spreadsheet:
+                    instance.__spreadsheet = instance._open() # noqa
+        return instance.__spreadsheet
 
     def __set__(self, instance, value):
         """Descriptor for assigning a value to a field in a document."""
@@ -26,9 +45,119 @@ class GoogleSheetsDB:
 
     SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
     spreadsheets = []
+    # Spreadsheet id -> database
+    registry = {}
+    # Worksheet for calculation of formulas
+    SCRATCH_SHEET = '_google_sheets_db'
     spreadsheet = SpreadSheetDescriptor()
 
-    def __init__(self, spreadsheet_id, *args, credentails_file=None, credentials_pickle=None, **kwargs):
+    TRANSPORTS = {
+        'gspread': GspreadTransport,
+        'values': ValuesApiTransport,
+    }
+    # Transport methods writing values, they are idempotent, so can be recorded in the journal and resent
+    JOURNALED = ('batch_update', 'clear')
+
+    def __init__(self, spreadsheet_id, *args, credentails_file=None, credentials_pickle=None,
+                 transport: str | Transport = 'gspread', journal: str | Journal = None,
+                 identity_map_size: int = None, batch_window: float = None, batch_max_rows: int = 1000,
+                 max_requests_per_minute: int = None, **kwargs):
+        self.spreadsheet_id = spreadsheet_id
+        if isinstance(transport, str):
+            transport = self.TRANSPORTS[transport]()
+        transport.bind(self)
+        self.transport = transport
+        if isinstance(journal, str):
+            journal = Journal(journal)
+        self.journal = journal
+        # Every thread gets its own identity map if the size is given
+        self.identity_map_size = identity_map_size
+        self._scopes = local()
+        # Values requests of all threads wait if the quota would be exceeded
+        self.rate_limiter = RateLimiter(max_requests_per_minute) if max_requests_per_minute else None
+        # Writes of all threads are merged into one request within the window if it is given
+        self.batcher = None
+        if batch_window is not None:
+            self.batcher = WriteBatcher(lambda data: self._send('batch_update', data),
+                                        window=batch_window, max_rows=batch_max_rows)
+        self.credentails_file = credentails_file
+        self.credentials_pickle = credentials_pickle
+        self.closed = False
+        self._lock = RLock()
+        self._evaluate_lock = Lock()
+        # Worksheet title -> worksheet, fetched on first use
+        self._worksheets = None
+        # Connection is established on first use of the spreadsheet
+        self.spreadsheet = None
+        self.spreadsheets.append(self)
+        self.registry.setdefault(spreadsheet_id, self)
+
+    @property
+    def _recorder(self) -> Optional[RecordingTransport]:
+        """Recording transport of a dry run in the current context"""
+        return _recorders.get().get(self)
+
+    @property
+    def transport(self) -> Transport:
+        """Transport of the spreadsheet, the recording one within a dry run"""
+        recorder = self._recorder
+        return recorder if recorder is not None else self._transport
+
+    @transport.setter
+    def transport(self, transport: Transport) -> None:
+        self._transport = transport
+
+    @property
+    def journal(self) -> Optional[Journal]:
+        return self._journal if self._recorder is None else None
+
+    @journal.setter
+    def journal(self, journal: Optional[Journal]) -> None:
+        self._journal = journal
+
+    @property
+    def batcher(self) -> Optional[WriteBatcher]:
+        return self._batcher if self._recorder is None else None
+
+    @batcher.setter
+    def batcher(self, batcher: Optional[WriteBatcher]) -> None:
+        self._batcher = batcher
+
+    @property
+    def rate_limiter(self) -> Optional[RateLimiter]:
+        return self._rate_limiter if self._recorder is None else None
+
+    @rate_limiter.setter
+    def rate_limiter(self, rate_limiter: Optional[RateLimiter]) -> None:
+        self._rate_limiter = rate_limiter
+
+    @property
+    def _worksheets(self) -> Optional[dict]:
+        recorder = self._recorder
+        return recorder.worksheets_cache if recorder is not None else self.__worksheets
+
+    @_worksheets.setter
+    def _worksheets(self, worksheets: Optional[dict]) -> None:
+        recorder = self._recorder
+        if recorder is not None:
+            recorder.worksheets_cache = worksheets
+        else:
+            self.__worksheets = worksheets
+
+    @classmethod
+    def get(cls, spreadsheet_id=None) -> 'GoogleSheetsDB':
+        """Returns declared database by spreadsheet id, the first declared one by default"""
+        if spreadsheet_id:
+            if spreadsheet_id not in cls.registry:
+                raise Exception(f"Spreadsheet {spreadsheet_id} is not declared.")
+            return cls.registry[spreadsheet_id]
+        if not cls.spreadsheets:
+            raise Exception("No spreadsheet specified.")
+        return cls.spreadsheets[0]
+
+    def _open(self):
+        credentails_file = self.credentails_file
+        credentials_pickle = self.credentials_pickle
         if not credentials_pickle:
             if credentails_file:
                 credentials_pickle = split(credentails_file)[0]
@@ -48,22 +177,66 @@ class GoogleSheetsDB:
                 pickle.dump(credentials, token)
 
         gc = gspread.authorize(credentials)
-        self.spreadsheet_id = spreadsheet_id
-        self.spreadsheet = gc.open_by_key(self.spreadsheet_id)
-        self.spreadsheets.append(self)
+        return gc.open_by_key(self.spreadsheet_id)
+
+    def connect(self):
+        """Connects to the spreadsheet right away instead of the first use"""
+        return self.spreadsheet
 
     def close(self):
+        if self.batcher:
+            self.batcher.close()
         self.spreadsheets.remove(self)
+        if self.registry.get(self.spreadsheet_id) is self:
+            del self.registry[self.spreadsheet_id]
+            # Another open database of the same spreadsheet takes its place
+            for db in self.spreadsheets:
+                if db.spreadsheet_id == self.spreadsheet_id:
+                    self.registry[self.spreadsheet_id] = db
+                    break
         self.spreadsheet = None
+        self.closed = True
+        self._worksheets = None
+        if self.journal:
+            self.journal.close()
+
+    def refresh(self) -> None:
+        """
+        Fetches worksheets metadata
+
+        It is cached and updated by the structural changes made by the library.
+        Call it if worksheets were added, removed or resized by others.
+        """
+        if self.closed:
+            raise Exception("Spreadsheet is closed.")
+        worksheets = self.transport.worksheets()
+        with self._lock:
+            self._worksheets = {worksheet.title: worksheet for worksheet in worksheets}
+
+    @property
+    def worksheets(self) -> dict:
+        """Cached worksheets by title"""
+        if self.closed:
+            raise Exception("Spreadsheet is closed.")
+        if self._worksheets is None:
+            self.refresh()
+        return self._worksheets
 
     def get_sheet_by_name(self, name):
-        return self.spreadsheet.worksheet(name)
+        try:
+            return self.worksheets[name]
+        except KeyError:
+            raise gspread.WorksheetNotFound(name)
 
     def get_sheets(self):
-        return self.spreadsheet.worksheets()
+        return list(self.worksheets.values())
 
     def create_sheet(self, name, rows=100, cols=20):
-        return self.spreadsheet.add_worksheet(title=name, rows=str(rows), cols=str(cols))
+        worksheet = self.transport.add_worksheet(name, rows=rows, cols=cols)
+        with self._lock:
+            if self._worksheets is not None:
+                self._worksheets[worksheet.title] = worksheet
+        return worksheet
 
     def create_sheet_if_not_exists(self, name, rows=100, cols=20):
         try:
@@ -72,13 +245,146 @@ class GoogleSheetsDB:
             return self.create_sheet(name, rows=rows, cols=cols)
 
     def drop_sheet(self, worksheet):
-        self.spreadsheet.del_worksheet(worksheet)
+        self.transport.del_worksheet(worksheet)
+        with self._lock:
+            if self._worksheets is not None:
+                self._worksheets.pop(worksheet.title, None)
+
+    @contextmanager
+    def scope(self, size: int = 1000) -> Iterator[IdentityMap]:
+        """
+        Makes reads of the same row return the same instance within the block in the current thread
+
+        Rows read by `with_pk` within the block are returned without API calls.
+        """
+        if not hasattr(self._scopes, 'maps'):
+            self._scopes.maps = []
+        self._scopes.maps.append(IdentityMap(size))
+        try:
+            yield self._scopes.maps[-1]
+        finally:
+            self._scopes.maps.pop()
+
+    @property
+    def identity_map(self) -> Optional[IdentityMap]:
+        """Identity map of the innermost scope of the current thread or the thread one, its copy within a dry run"""
+        maps = getattr(self._scopes, 'maps', None)
+        if maps:
+            identity_map = maps[-1]
+        elif not self.identity_map_size:
+            return None
+        else:
+            if not hasattr(self._scopes, 'thread_map'):
+                self._scopes.thread_map = IdentityMap(self.identity_map_size)
+            identity_map = self._scopes.thread_map
+        recorder = self._recorder
+        if recorder is not None:
+            return recorder.state(identity_map, 'identity_map', identity_map.copy)
+        return identity_map
+
+    @property
+    def recording(self) -> bool:
+        """Whether an operation is dry-run by `explain` in the current context, so writes are not sent"""
+        return self._recorder is not None
+
+    def write(self, data: list[dict[str, Any]]) -> Any:
+        """
+        Writes values of absolute ranges, records the write in the journal if it is enabled
+
+        With batching enabled waits until the write is sent together with writes of other threads.
+        Calls API once.
+        """
+        if self.batcher:
+            return self.batcher.submit(data).result()
+        return self._send('batch_update', data)
+
+    def clear_range(self, range_name: str) -> Any:
+        """
+        Clears values of an absolute range, records it in the journal if it is enabled
+
+        Calls API once.
+        """
+        if self.batcher:
+            # Writes enqueued before must not overwrite the cleared range
+            self.batcher.flush()
+        return self._send('clear', range_name)
+
+    def throttle(self) -> None:
+        """Waits until one more request fits into the rate limit"""
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+
+    def _send(self, op: str, payload: Any) -> Any:
+        self.throttle()
+        if not self.journal:
+            return getattr(self.transport, op)(payload)
+        entry_id = self.journal.record(op, payload)
+        result = getattr(self.transport, op)(payload)
+        self.journal.ack(entry_id)
+        return result
+
+    def replay(self) -> int:
+        """
+        Resends writes of the journal which were not acknowledged, e.g. after a crash or a quota error
+
+        Writes are resent in the order they were recorded, resending a write that has landed is harmless
+        only if nobody else wrote to the sheets since: inserts are recorded with absolute rows,
+        so replaying one overwrites a row appended there by another writer meanwhile.
+        Returns number of resent writes. Calls API once per write.
+        Indexes of models built before are not updated, call `reset_indexes` of the written models.
+        """
+        if not self.journal:
+            raise Exception("Journal is not enabled.")
+        resent = 0
+        for entry in self.journal.pending():
+            if entry['op'] not in self.JOURNALED:
+                raise Exception(f"Unknown journal operation: {entry['op']}.")
+            self.throttle()
+            getattr(self.transport, entry['op'])(entry['payload'])
+            self.journal.ack(entry['id'])
+            resent += 1
+        self.journal.compact()
+        return resent
+
+    def explain(self, operation: Callable[[], Any], reads: bool = True) -> Plan:
+        """
+        Runs the operation as a dry run and returns the API calls it makes
+
+        Reads are sent, writes are only recorded. With `reads=False` nothing is sent and reads return no rows,
+        so no quota is used, but the plan does not reflect table sizes.
+        The dry run is seen only by the current thread and the workers it starts: the journal, batching
+        and the rate limit are bypassed there, while other threads keep using the database as usual.
+        Worksheets metadata, indexes, reserved rows and identity maps are changed in copies,
+        instances saved by the operation are left unchanged.
+        """
+        recorder = RecordingTransport(self._transport if reads else None)
+        recorder.bind(self)
+        recorder.worksheets_cache = dict(self._worksheets) if self._worksheets is not None else None
+        token = _recorders.set({**_recorders.get(), self: recorder})
+        try:
+            operation()
+        finally:
+            _recorders.reset(token)
+        return recorder.plan
+
+    def evaluate(self, formulas: list[str]) -> list[Any]:
+        """
+        Calculates formulas in the scratch worksheet and returns their values
+
+        Calls API twice: to write formulas getting values back and to clear them.
+        """
+        if not self.transport.supports_formulas:
+            raise NotImplementedError(f"{self.transport.__class__.__name__} does not calculate formulas.")
+        with self._evaluate_lock:
+            sheet = self.create_sheet_if_not_exists(self.SCRATCH_SHEET, rows=1, cols=max(len(formulas), 26))
+            end = rowcol_to_a1(1, len(formulas))
+            return self.transport.evaluate(absolute_range_name(sheet.title, f'A1:{end}'), formulas)
 
     def get_sheets_names(self):
-        return [sheet.title for sheet in self.get_sheets()]
+        return list(self.worksheets)
 
     def sheet_exists(self, name):
-        return name in self.get_sheets_names()
+        return name in self.worksheets
 
     def get_sheets_map(self, inverted=False):
         if inverted:
@@ -0,0 +1,176 @@
+import re
+from threading import RLock
+from typing import Any, Callable, Optional
+
+from gspread.utils import absolute_range_name, rowcol_to_a1
+
+from google_sheets_db.transport import MemoryTransport, MemoryWorksheet, Transport, split_range
+
+# Transport methods which only read, the rest change the spreadsheet
+READS = ('worksheets', 'batch_get', 'evaluate')
+
+
+class ApiCall:
+    """API call planned by a dry run"""
+
+    def __init__(self, op: str, ranges: list[str] = None, cells: Optional[int] = 0, full_scan: bool = False):
+        self.op = op
+        self.ranges = ranges or []
+        # Cells read or written, None if it is not known without a read, e.g. for clear
+        self.cells = cells
+        # Whether the read gets a whole table or column, so its cost grows with the table
+        self.full_scan = full_scan
+
+    def __repr__(self):
+        return f'ApiCall({self.op!r}, ranges={self.ranges}, cells={self.cells}, full_scan={self.full_scan})'
+
+    @property
+    def is_read(self) -> bool:
+        return self.op in READS
+
+
+class Plan:
+    """API calls made by an operation in order, as recorded by `RecordingTransport`"""
+
+    def __init__(self):
+        self.calls: list[ApiCall] = []
+
+    def __repr__(self):
+        return f'Plan(api_calls={self.api_calls}, scans={len(self.scans)})'
+
+    def __str__(self):
+        lines = [f'{self.api_calls} API calls: {len(self.reads)} reads of {self.read_cells} cells, '
+                 f'{len(self.writes)} writes of {self.written_cells} cells, {len(self.scans)} full table scans']
+        for call in self.calls:
+            cells = '?' if call.cells is None else call.cells
+            scan = '  O(N) full table scan' if call.full_scan else ''
+            lines.append(f'  {call.op} {", ".join(call.ranges)} ({cells} cells){scan}')
+        return '\n'.join(lines)
+
+    @property
+    def api_calls(self) -> int:
+        return len(self.calls)
+
+    @property
+    def reads(self) -> list[ApiCall]:
+        return [call for call in self.calls if call.is_read]
+
+    @property
+    def writes(self) -> list[ApiCall]:
+        return [call for call in self.calls if not call.is_read]
+
+    @property
+    def scans(self) -> list[ApiCall]:
+        """Reads which cost grows with the table size"""
+        return [call for call in self.reads if call.full_scan]
+
+    @property
+    def read_cells(self) -> int:
+        return sum(call.cells or 0 for call in self.reads)
+
+    @property
+    def written_cells(self) -> int:
+        return sum(call.cells or 0 for call in self.writes)
+
+
+def is_full_scan(range_name: str) -> bool:
+    """Whether the range has no last row, e.g. `'Sheet1'!A1:C` or a whole sheet"""
+    cells = split_range(range_name)[1]
+    if not cells:
+        return True
+    start, _, end = cells.partition(':')
+    return not re.search(r'\d', end or start)
+
+
+class RecordingTransport(Transport):
+    """
+    Records API calls of a dry run
+
+    Reads are sent to the wrapped transport, so the plan reflects real table sizes,
+    writes, structural changes and formulas, which are calculated by writing them, are only recorded.
+    Without a transport reads return nothing.
+    Worksheets added by the dry run are read as empty.
+    Worksheets metadata, indexes and the identity map are changed in copies kept by the recorder.
+    """
+
+    def __init__(self, transport: Transport = None):
+        self.transport = transport
+        self.supports_formulas = bool(transport and transport.supports_formulas)
+        self.plan = Plan()
+        self._added: set[str] = set()
+        # Worksheets metadata of the database as seen by the dry run
+        self.worksheets_cache: Optional[dict] = None
+        # (owner, name) -> copy of a state the dry run changes instead of the original
+        self._states: dict[tuple, Any] = {}
+        self._lock = RLock()
+
+    def bind(self, db) -> None:
+        # The wrapped transport stays bound to its database
+        self.db = db
+
+    def state(self, owner: Any, name: str, factory: Callable[[], Any]) -> Any:
+        """Returns the copy of a state made by `factory` on first use, so the dry run does not change the original"""
+        with self._lock:
+            key = (owner, name)
+            if key not in self._states:
+                self._states[key] = factory()
+            return self._states[key]
+
+    def _record(self, call: ApiCall) -> None:
+        with self._lock:
+            self.plan.calls.append(call)
+
+    def worksheets(self) -> list:
+        self._record(ApiCall('worksheets'))
+        return self.transport.worksheets() if self.transport else []
+
+    def add_worksheet(self, title: str, rows: int, cols: int) -> MemoryWorksheet:
+        self._record(ApiCall('add_worksheet', [title]))
+        with self._lock:
+            self._added.add(title)
+        return MemoryWorksheet(-1, title, int(rows), int(cols))
+
+    def del_worksheet(self, worksheet) -> None:
+        self._record(ApiCall('del_worksheet', [worksheet.title]))
+
+    def batch_get(self, ranges: list[str]) -> list[list[list[Any]]]:
+        sent = [range_name for range_name in ranges if split_range(range_name)[0] not in self._added]
+        values = dict(zip(sent, self.transport.batch_get(sent) if self.transport and sent else []))
+        result = [values.get(range_name, []) for range_name in ranges]
+        cells = sum(len(row) for range_values in result for row in range_values)
+        self._record(ApiCall('batch_get', list(ranges), cells, any(map(is_full_scan, ranges))))
+        return result
+
+    def batch_update(self, data: list[dict[str, Any]]) -> Any:
+        cells = sum(len(row) for item in data for row in item['values'])
+        self._record(ApiCall('batch_update', [item['range'] for item in data], cells))
+        return {'totalUpdatedCells': cells}
+
+    def insert_rows(self, worksheet, values: list[list[Any]], row: int) -> Any:
+        cells = sum(len(values_row) for values_row in values)
+        self._record(ApiCall('insert_rows', [absolute_range_name(worksheet.title, f'A{row}')], cells))
+        return None
+
+    def add_rows(self, worksheet, rows: int) -> Any:
+        self._record(ApiCall('add_rows', [worksheet.title]))
+        return None
+
+    def clear(self, range_name: str) -> Any:
+        self._record(ApiCall('clear', [range_name], None))
+        return None
+
+    def append(self, range_name: str, values: list[list[Any]]) -> str:
+        cells = sum(len(values_row) for values_row in values)
+        self._record(ApiCall('append', [range_name], cells))
+        # The last row is not known without a read, rows are reported as written from the start of the range
+        title, range_cells = split_range(range_name)
+        row, col = MemoryTransport._parse_cell((range_cells or 'A1').partition(':')[0])
+        width = max([len(values_row) for values_row in values] + [1])
+        start = rowcol_to_a1(row or 1, col or 1)
+        end = rowcol_to_a1((row or 1) + len(values) - 1, (col or 1) + width - 1)
+        return absolute_range_name(title, f'{start}:{end}')
+
+    def evaluate(self, range_name: str, formulas: list[str]) -> list[Any]:
+        # Formulas are written to the scratch worksheet to be calculated, so they are only recorded
+        self._record(ApiCall('evaluate', [range_name], len(formulas)))
+        return [''] * len(formulas)
@@ -1,3 +1,4 @@
+import re
 from typing import Any
 
 
@@ -9,17 +10,41 @@ class Field:
             name: str = None,
             order_number: int = None,
             primary_key: bool = False,
-            default: Any = '%#not_specified#%'
+            default: Any = '%#not_specified#%',
+            index: bool = False,
+            unique: bool = False
     ):
         self.name = name
         self.order_number = order_number
         self.primary_key = primary_key
+        # Unique fields are always indexed to check uniqueness cheaply
+        self.unique = unique
+        self.index = index or unique
         self.field_type = field_type
         self.default = field_type() if default == '%#not_specified#%' else default
 
     def __repr__(self):
         return f'Field({self.name})'
 
+    def to_python(self, value: Any) -> Any:
+        """Converts a value read from the sheet to the field type, empty values to None"""
+        if value is None or value == '':
+            return None
+        if isinstance(value, self.field_type):
+            return value
+        try:
+            if self.field_type is bool:
+                return str(value).upper() in ('TRUE', '1')
+            if self.field_type in (int, float) and isinstance(value, str):
+                # Formatted numbers may have thousands separators, e.g. '1,200'
+                value = re.sub(r'[\s,]', '', value)
+            if self.field_type is int and isinstance(value, str):
+                # Numbers may be formatted as floats
+                return int(float(value)) if '.' in value else int(value)
+            return self.field_type(value)
+        except (TypeError, ValueError):
+            raise Exception(f"Value {value!r} of field {self.name} is not of type {self.field_type.__name__}.")
+
     def __get__(self, instance, owner):
         """Descriptor for retrieving a value from a field in a document."""
         if instance is None:
@@ -39,12 +64,15 @@ class Field:
             if callable(value):
                 value = value() # noqa
 
+        # Remember changed fields to write only them on save
+        if self.name not in instance._data or instance._data[self.name] != value: # noqa
+            instance._dirty.add(self.name) # noqa
         instance._data[self.name] = value # noqa
 
 
 class PrimaryKey(Field):
 
-    def __init__(self, *args, field_type=None, default='%#not_specified#%', **kwargs):
+    def __init__(self, *args, field_type=None, default='%#not_specified#%', order: int = None, **kwargs):
         # Yes, it is a primary key, ignore the keyword
         kwargs.pop('primary_key', None)
         # By default: int
@@ -54,6 +82,30 @@ class PrimaryKey(Field):
             if default == '%#not_specified#%':
                 default = None
         super().__init__(*args, primary_key=True, field_type=field_type, default=default, **kwargs)
+        # Position in a composite primary key
+        self.order = order
 
     def __repr__(self):
         return f'PrimaryKey({self.name})'
+
+
+class ReferenceField(Field):
+    """
+    Primary key of a row of another model
+
+    The field value is the key, the referenced instance is returned by `instance.related(name)`
+    and can be prefetched for many rows with `get_table_records(prefetch=[name])`.
+    """
+
+    def __init__(self, model, *args, **kwargs):
+        self.model = model
+        super().__init__(*args, **kwargs)
+
+    def __repr__(self):
+        return f'ReferenceField({self.name} -> {self.model.__name__})'
+
+    def __set__(self, instance, value):
+        # Referenced instance of the previous key is not valid anymore
+        if instance._data.get(self.name) != value: # noqa
+            instance._related.pop(self.name, None) # noqa
+        super().__set__(instance, value)
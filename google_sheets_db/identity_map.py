@@ -0,0 +1,136 @@
+from collections import OrderedDict
+from threading import RLock
+from typing import Any, Hashable, Optional
+from weakref import WeakValueDictionary
+
+
+class IdentityMap:
+    """
+    Instances of rows by model and primary key, so reads of the same row return the same instance
+
+    Instances are referenced weakly, the last `size` used ones are also kept alive.
+    """
+
+    def __init__(self, size: int = 1000):
+        self.size = size
+        # (model, primary key) -> instance
+        self._instances = WeakValueDictionary()
+        self._recent: OrderedDict[tuple, Any] = OrderedDict()
+        # (model, row index) -> primary key
+        self._keys: dict[tuple, Hashable] = {}
+        self._lock = RLock()
+
+    def __repr__(self):
+        return f'IdentityMap(size={self.size}, instances={len(self)})'
+
+    def __len__(self):
+        return len(self._instances)
+
+    def copy(self) -> 'IdentityMap':
+        """Returns a map keeping the same instances which changes do not reach this one"""
+        with self._lock:
+            identity_map = IdentityMap(self.size)
+            identity_map._instances = WeakValueDictionary(self._instances)
+            identity_map._recent = OrderedDict(self._recent)
+            identity_map._keys = dict(self._keys)
+            return identity_map
+
+    def _touch(self, key: tuple, instance: Any) -> None:
+        self._recent[key] = instance
+        self._recent.move_to_end(key)
+        while len(self._recent) > self.size:
+            self._recent.popitem(last=False)
+
+    def get(self, model, pk: Any) -> Optional[Any]:
+        """Returns the instance of the primary key if it is kept"""
+        key = (model, model._pk_key(pk))
+        with self._lock:
+            instance = self._instances.get(key)
+            if instance is not None:
+                self._touch(key, instance)
+            return instance
+
+    def at_index(self, model, index: int) -> Optional[Any]:
+        """Returns the kept instance of the row index"""
+        with self._lock:
+            pk = self._keys.get((model, index))
+            instance = self._instances.get((model, pk)) if pk is not None else None
+            if instance is None or instance._index != index:
+                return None
+            return instance
+
+    def merge(self, instance: Any) -> Any:
+        """
+        Keeps the instance, returns the already kept one with the same primary key instead
+
+        The kept instance gets values of the given one except fields changed and not saved yet.
+        """
+        model = type(instance)
+        # Rows of models without a primary key have no identity
+        if not model.get_primary_fields():
+            return instance
+        pk = model._pk_key(instance.pk)
+        if pk is None:
+            return instance
+        key = (model, pk)
+        with self._lock:
+            kept = self._instances.get(key)
+            if kept is not None and kept is not instance:
+                for name, value in instance._data.items():
+                    if name not in kept._dirty:
+                        self._assign(kept, name, value)
+                if instance._index is not None:
+                    kept._index = instance._index
+                instance = kept
+            self._instances[key] = instance
+            if instance._index is not None:
+                self._keys[(model, instance._index)] = pk
+                if len(self._keys) > 2 * max(self.size, len(self._instances)):
+                    self._prune_keys()
+            self._touch(key, instance)
+            return instance
+
+    @staticmethod
+    def _assign(instance: Any, name: str, value: Any) -> None:
+        # Referenced instance of a changed key is not valid anymore
+        if instance._data.get(name) != value:
+            instance._related.pop(name, None)
+        instance._data[name] = value
+
+    def _prune_keys(self) -> None:
+        """Forgets row indexes of collected instances"""
+        self._keys = {(model, instance._index): pk for (model, pk), instance in list(self._instances.items())
+                      if instance._index is not None}
+
+    def apply(self, model, index: int, row: dict[str, Any]) -> None:
+        """Writes field values saved by the library to the kept instance of the row"""
+        if not model.get_primary_fields():
+            return
+        with self._lock:
+            instance = self.at_index(model, index)
+            if instance is None:
+                return
+            old_key = (model, model._pk_key(instance.pk))
+            for name, value in row.items():
+                self._assign(instance, name, value)
+                instance._dirty.discard(name)
+            new_key = (model, model._pk_key(instance.pk))
+            if new_key != old_key:
+                self._instances.pop(old_key, None)
+                self._recent.pop(old_key, None)
+                self.merge(instance)
+
+    def forget(self, model) -> None:
+        """Forgets instances of the model, e.g. after the sheet was truncated"""
+        with self._lock:
+            for key in [key for key in list(self._instances.keys()) if key[0] is model]:
+                self._instances.pop(key, None)
+                self._recent.pop(key, None)
+            for key in [key for key in self._keys if key[0] is model]:
+                del self._keys[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._instances.clear()
+            self._recent.clear()
+            self._keys.clear()
@@ -0,0 +1,109 @@
+from threading import RLock
+from typing import Any, Hashable, Iterable, Optional
+
+
+class HashIndex:
+    """
+    In-memory hash index of a column: value -> row indexes
+
+    Row indexes are 1-based and relative to the sheet start row, like `BaseSheet._index`.
+    Values are compared as strings, because that is how the sheet returns them.
+    Tuples of values (composite keys) are compared as tuples of strings.
+    Empty values are not indexed.
+    """
+
+    def __init__(self, name: str, unique: bool = False):
+        self.name = name
+        self.unique = unique
+        self.built = False
+        self._rows: dict[Hashable, set[int]] = {}
+        self._keys: dict[int, Hashable] = {}
+        self._lock = RLock()
+
+    def __repr__(self):
+        return f'HashIndex({self.name})'
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, value: Any) -> bool:
+        """Whether a row holds the value"""
+        return bool(self.lookup(value))
+
+    @staticmethod
+    def key(value: Any) -> Optional[Hashable]:
+        """Normalizes value to an index key"""
+        if isinstance(value, (tuple, list)):
+            parts = tuple(HashIndex.key(part) for part in value)
+            # Keys with empty parts are not indexed
+            return None if None in parts else parts
+        if value is None or value == '':
+            return None
+        return str(value)
+
+    def build(self, values: Iterable[Any]) -> None:
+        """(Re)builds index from column values, the first value is the row 1"""
+        with self._lock:
+            self.clear()
+            for i, value in enumerate(values):
+                self._add(i + 1, self.key(value))
+            self.built = True
+
+    def copy(self) -> 'HashIndex':
+        """Returns an index of the same rows which changes do not reach this one"""
+        with self._lock:
+            index = HashIndex(self.name, unique=self.unique)
+            index.built = self.built
+            index._rows = {key: set(rows) for key, rows in self._rows.items()}
+            index._keys = dict(self._keys)
+            return index
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rows = {}
+            self._keys = {}
+            self.built = False
+
+    def lookup(self, value: Any) -> list[int]:
+        """Returns sorted row indexes holding the value"""
+        key = self.key(value)
+        if key is None:
+            return []
+        with self._lock:
+            return sorted(self._rows.get(key, ()))
+
+    def key_at(self, index: int) -> Optional[Hashable]:
+        """Returns the key of the row, None if the row is not indexed"""
+        with self._lock:
+            return self._keys.get(index)
+
+    def set(self, index: int, value: Any) -> None:
+        """Sets the value of the row, replacing the previous one"""
+        with self._lock:
+            self.discard(index)
+            self._add(index, self.key(value))
+
+    def discard(self, index: int) -> None:
+        """Removes the row from the index"""
+        with self._lock:
+            key = self._keys.pop(index, None)
+            if key is None:
+                return
+            rows = self._rows[key]
+            rows.discard(index)
+            if not rows:
+                del self._rows[key]
+
+    def check_unique(self, value: Any, index: int = None) -> None:
+        """Raises if the value is already taken by a row other than `index`"""
+        if not self.unique:
+            return
+        rows = [i for i in self.lookup(value) if i != index]
+        if rows:
+            raise Exception(f"Value of unique field {self.name} is not unique: {value}.")
+
+    def _add(self, index: int, key: Optional[Hashable]) -> None:
+        if key is None:
+            return
+        self._keys[index] = key
+        self._rows.setdefault(key, set()).add(index)
@@ -0,0 +1,108 @@
+import json
+import os
+import time
+from threading import RLock
+from typing import Any
+
+
+class Journal:
+    """
+    Append-only local journal of writes, one JSON line per record
+
+    A write is recorded before it is sent and acknowledged after it succeeded.
+    Writes without acknowledgement are pending and are resent by `GoogleSheetsDB.replay`.
+    Every line is flushed at once, so a killed process loses nothing,
+    while fsync is batched: every `sync_every` lines or `sync_interval` seconds.
+    """
+
+    def __init__(self, path: str, sync_every: int = 100, sync_interval: float = 1.0):
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self._lock = RLock()
+        # Entry id -> entry which was not acknowledged
+        self._pending: dict[int, dict[str, Any]] = {}
+        self._next_id = 1
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+        self._load()
+        self._file = None
+        self.compact()
+
+    def __repr__(self):
+        return f'Journal({self.path!r}, pending={len(self._pending)})'
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # The last line is torn if the process died while writing it
+                    continue
+                if 'ack' in record:
+                    self._pending.pop(record['ack'], None)
+                    self._next_id = max(self._next_id, record['ack'] + 1)
+                else:
+                    self._pending[record['id']] = record
+                    self._next_id = max(self._next_id, record['id'] + 1)
+
+    def _append(self, record: dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, default=str) + '\n')
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every or time.monotonic() - self._synced_at >= self.sync_interval:
+            self.sync()
+
+    def record(self, op: str, payload: Any) -> int:
+        """Records a write which is about to be sent, returns its id"""
+        with self._lock:
+            entry = {'id': self._next_id, 'op': op, 'payload': payload}
+            self._next_id += 1
+            self._append(entry)
+            self._pending[entry['id']] = entry
+            return entry['id']
+
+    def ack(self, entry_id: int) -> None:
+        """Marks the write as sent"""
+        with self._lock:
+            if self._pending.pop(entry_id, None) is not None:
+                self._append({'ack': entry_id})
+
+    def pending(self) -> list[dict[str, Any]]:
+        """Returns writes which were not acknowledged in the order they were recorded"""
+        with self._lock:
+            return [self._pending[entry_id] for entry_id in sorted(self._pending)]
+
+    def sync(self) -> None:
+        """Forces recorded lines to the disk"""
+        with self._lock:
+            if self._file and self._unsynced:
+                os.fsync(self._file.fileno())
+            self._unsynced = 0
+            self._synced_at = time.monotonic()
+
+    def compact(self) -> None:
+        """Rewrites the journal keeping only pending writes"""
+        with self._lock:
+            if self._file:
+                self._file.close()
+            tmp_path = f'{self.path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                for entry in self.pending():
+                    file.write(json.dumps(entry, default=str) + '\n')
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, self.path)
+            self._file = open(self.path, 'a', encoding='utf-8')
+            self._unsynced = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file:
+                return
+            self.compact()
+            self._file.close()
+            self._file = None
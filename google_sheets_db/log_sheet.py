@@ -0,0 +1,273 @@
+import re
+from datetime import datetime
+from itertools import chain
+from typing import Any, Callable, Optional, Self, Union
+
+import pandas as pd
+from gspread.utils import a1_to_rowcol
+
+from google_sheets_db.base_sheet import BaseSheet
+from google_sheets_db.concurrency import run_parallel
+from google_sheets_db.transport import split_range
+
+MAX_ROWS = 50000
+
+
+class LogSegment:
+    """Worksheet of a log sheet with its model and the number of rows known from appends and reads"""
+
+    def __init__(self, model, title: str, key: tuple[int, int, int]):
+        self.model = model
+        self.title = title
+        # (year, month, number within the month)
+        self.key = key
+        self.rows: Optional[int] = None
+
+    def __repr__(self):
+        return f'LogSegment({self.title!r}, rows={self.rows})'
+
+
+class LogSheet(BaseSheet):
+    """
+    Append-only sheet stored in worksheets by months, e.g. `Events_2026_10`, `Events_2026_10_2`
+
+    Rows are appended without reading the sheet. A new worksheet is started every month
+    and when the current one reaches `meta['max_rows']` rows or `meta['max_cells']` cells.
+    Empty values of `meta['timestamp_field']` are filled with the append time in ISO format.
+    """
+
+    @classmethod
+    def _now(cls) -> datetime:
+        return datetime.now()
+
+    @classmethod
+    def _is_segment(cls) -> bool:
+        return bool(cls.meta.get('segment'))
+
+    @classmethod
+    def _segment_key(cls, title: str) -> Optional[tuple[int, int, int]]:
+        match = re.fullmatch(re.escape(cls._sheet_name) + r'_(\d{4})_(\d{2})(?:_(\d+))?', title)
+        if not match:
+            return None
+        return int(match[1]), int(match[2]), int(match[3] or 1)
+
+    @classmethod
+    def _segments(cls) -> list[LogSegment]:
+        """
+        Returns worksheets of the log from the oldest to the latest
+
+        Uses cached metadata, no API calls usually.
+        """
+        segments = []
+        for title in cls._db.get_sheets_names():
+            key = cls._segment_key(title)
+            if key:
+                segments.append(cls._segment(title, key))
+        return sorted(segments, key=lambda segment: segment.key)
+
+    @classmethod
+    def _segment(cls, title: str, key: tuple[int, int, int]) -> LogSegment:
+        with cls._log_lock:
+            segment = cls._log_segments.get(title)
+            if segment is None:
+                attrs = {field.name: field for field in cls._columns}
+                attrs['meta'] = {**cls.meta, 'sheet_name': title, 'segment': True}
+                attrs['__module__'] = cls.__module__
+                attrs['__qualname__'] = cls.__qualname__
+                model = type(cls)(cls.__name__, (cls,), attrs)
+                segment = cls._log_segments[title] = LogSegment(model, title, key)
+            return segment
+
+    @classmethod
+    def _is_full(cls, segment: LogSegment) -> bool:
+        if segment.rows is None:
+            return False
+        max_cells = cls.meta.get('max_cells')
+        return segment.rows >= (cls.meta.get('max_rows') or MAX_ROWS) or \
+            bool(max_cells and segment.rows * cls.last_column_number >= max_cells)
+
+    @classmethod
+    def _current_segment(cls) -> LogSegment:
+        """
+        Returns the worksheet to append to, starts a new one for a new month or if the latest one is full
+
+        Calls API only to create a worksheet.
+        """
+        now = cls._now()
+        month = [segment for segment in cls._segments() if segment.key[:2] == (now.year, now.month)]
+        if month and not cls._is_full(month[-1]):
+            return month[-1]
+        title = f'{cls._sheet_name}_{now:%Y_%m}'
+        key = (now.year, now.month, 1)
+        if month:
+            key = (now.year, now.month, month[-1].key[2] + 1)
+            title = f'{title}_{key[2]}'
+        cls._db.create_sheet_if_not_exists(title, rows=cls._sheet_start_row,
+                                           cols=cls._sheet_start_column + cls.last_column_number - 1)
+        segment = cls._segment(title, key)
+        segment.rows = 0
+        return segment
+
+    @classmethod
+    def append(cls, *rows: Union[list, tuple, dict, Self]) -> list[Self]:
+        """
+        Appends rows given as lists, dicts or instances to the latest worksheet
+
+        Returns instances with row indexes within their worksheet.
+        Calls API once, no reads; once more when a new worksheet is started.
+        """
+        values = [cls._list_row(row) for row in cls._unwrap_rows(rows)]
+        if not values:
+            return []
+        timestamp_field = cls.meta.get('timestamp_field')
+        if timestamp_field:
+            position = cls._get_column_by_name(timestamp_field).order_number - 1
+            now = cls._now().isoformat(timespec='seconds')
+            for row in values:
+                if row[position] in (None, ''):
+                    row[position] = now
+
+        # The worksheet is picked under the lock of the log, so it is rolled over once, the append is sent without it
+        with cls._log_lock:
+            segment = cls._current_segment()
+            # Rows being appended count towards the limit, so concurrent appends do not overfill the worksheet
+            # Rows of a dry run are not counted
+            reserved = segment.rows is not None and not cls._db.recording
+            if reserved:
+                segment.rows += len(values)
+        model = segment.model
+        start = model.cell_a1(model._sheet_start_column, model._sheet_start_row)
+        end = model.cell_a1(model._sheet_start_column + model.last_column_number - 1)
+        try:
+            updated_range = model.append_values(f'{start}:{end}', values)
+        except Exception:
+            if reserved:
+                with cls._log_lock:
+                    segment.rows -= len(values)
+            raise
+        last_row = a1_to_rowcol(split_range(updated_range)[1].split(':')[-1])[0]
+        last_index = last_row - model._sheet_start_row + 1
+        if not cls._db.recording:
+            with cls._log_lock:
+                segment.rows = max(segment.rows or 0, last_index)
+
+        first_index = last_index - len(values) + 1
+        return [model._from_row(row, _index=first_index + i) for i, row in enumerate(values)]
+
+    @classmethod
+    def insert(cls, *row, generate_pk=False, **fields) -> Self:
+        """Appends the row, primary keys are not generated. Calls API once."""
+        return cls.append(cls._prepare_row(*row, as_named=True, **fields))[0]
+
+    @classmethod
+    def insert_many(cls, *rows, chunk_size: int = None, max_workers: int = None) -> list[Self]:
+        """Appends the rows in one request. Calls API once."""
+        return cls.append(*rows)
+
+    @classmethod
+    def tail(cls, n: int) -> list[Self]:
+        """
+        Returns the last n rows
+
+        Reads only the latest worksheet, earlier ones are read if it has fewer rows.
+        Only the last rows are read from a worksheet with rows count known from appends. Calls API.
+        """
+        result = []
+        for segment in reversed(cls._segments()):
+            need = n - len(result)
+            if need <= 0:
+                break
+            model = segment.model
+            # Rows appended by others after the known ones are read too, the range is open-ended
+            first_index = max((segment.rows or 0) - need + 1, 1)
+            start = model.cell_a1(model._sheet_start_column, model._row_number(first_index))
+            end = model.cell_a1(model._sheet_start_column + model.last_column_number - 1)
+            values = model.get_range_values(f'{start}:{end}')[0]
+            segment.rows = max(segment.rows or 0, first_index + len(values) - 1)
+            first_index += max(len(values) - need, 0)
+            values = values[-need:]
+            records = [model._from_row(row, _index=first_index + i) for i, row in enumerate(values)]
+            result = records[-need:] + result
+        return result
+
+    @classmethod
+    def since(cls, timestamp: Union[datetime, str]) -> list[Self]:
+        """
+        Returns rows with `meta['timestamp_field']` not earlier than the timestamp
+
+        Only worksheets of its month and later ones are read, concurrently.
+        Timestamps are expected to be append times, as filled by `append`. Calls API.
+        """
+        name = cls.meta.get('timestamp_field')
+        if not name:
+            raise Exception(f"No timestamp_field in meta. Sheet schema: {cls.__name__}")
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp)
+        segments = [segment for segment in cls._segments() if segment.key[:2] >= (timestamp.year, timestamp.month)]
+        records = chain(*cls._fan_segments(lambda model: model._read_records(), segments))
+        return [record for record in records
+                if record[name] and datetime.fromisoformat(str(record[name])) >= timestamp]
+
+    @classmethod
+    def _fan_segments(cls, func: Callable[[Any], Any], segments: list[LogSegment] = None) -> list[Any]:
+        """Calls func for models of the worksheets concurrently, returns results from the oldest to the latest"""
+        segments = cls._segments() if segments is None else segments
+        return run_parallel(lambda segment: func(segment.model), segments, max_workers=cls.meta.get('max_workers'))
+
+    @classmethod
+    def _read_records(cls, parallel: int = None) -> list[Self]:
+        if cls._is_segment():
+            return super()._read_records(parallel)
+        return list(chain(*cls._fan_segments(lambda model: model._read_records(parallel))))
+
+    @classmethod
+    def get_table_values(cls, parallel: int = None) -> list[list[str]]:
+        if cls._is_segment():
+            return super().get_table_values(parallel)
+        return list(chain(*cls._fan_segments(lambda model: model.get_table_values(parallel))))
+
+    @classmethod
+    def get_frame(cls, parallel: int = None) -> pd.DataFrame:
+        if cls._is_segment():
+            return super().get_frame(parallel)
+        frames = cls._fan_segments(lambda model: model.get_frame(parallel))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=[field.name for field in cls._columns])
+
+    @classmethod
+    def count(cls) -> int:
+        if cls._is_segment():
+            return super().count()
+        return sum(cls._fan_segments(lambda model: model.count()))
+
+    @classmethod
+    def _update_cells(cls, updates: dict[int, dict[str, Any]]):
+        raise Exception(f"Log sheets are append-only. Sheet schema: {cls.__name__}")
+
+    @classmethod
+    def exists(cls) -> bool:
+        if cls._is_segment():
+            return type(cls).exists(cls)
+        return bool(cls._segments())
+
+    @classmethod
+    def create_sheet_if_not_exists(cls):
+        """Returns the worksheet to append to, creates it if needed"""
+        if cls._is_segment():
+            return type(cls).create_sheet_if_not_exists(cls)
+        return cls._current_segment().model._sheet
+
+    @classmethod
+    def drop(cls):
+        """Drops all worksheets of the log"""
+        if cls._is_segment():
+            return type(cls).drop(cls)
+        with cls._log_lock:
+            cls._fan_segments(lambda model: model.drop())
+            cls._log_segments.clear()
+
+    @classmethod
+    def truncate(cls):
+        """Drops all worksheets of the log, the next append starts a new one"""
+        if cls._is_segment():
+            return super().truncate()
+        return cls.drop()
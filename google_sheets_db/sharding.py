@@ -0,0 +1,44 @@
+import zlib
+from bisect import bisect_right
+from typing import Any
+
+
+class HashPartitioner:
+    """
+    Spreads rows over shards by a hash of the primary key
+
+    The hash is stable between processes, keys are hashed as strings,
+    so 5 and '5' go to the same shard.
+    """
+
+    def __repr__(self):
+        return 'HashPartitioner()'
+
+    def shard_for(self, key: Any, shards_count: int) -> int:
+        return zlib.crc32(str(key).encode()) % shards_count
+
+
+class RangePartitioner:
+    """
+    Spreads rows over shards by ranges of the primary key
+
+    `bounds` are sorted exclusive upper bounds of all shards except the last one:
+    RangePartitioner([1000, 2000]) puts keys below 1000 to the first shard,
+    keys from 1000 to 1999 to the second one and the rest to the third one.
+    """
+
+    def __init__(self, bounds: list[Any]):
+        if not bounds:
+            raise Exception("Range partitioner needs at least one bound.")
+        self.bounds = sorted(bounds)
+
+    def __repr__(self):
+        return f'RangePartitioner({self.bounds})'
+
+    def shard_for(self, key: Any, shards_count: int) -> int:
+        if shards_count != len(self.bounds) + 1:
+            raise Exception(f"Range partitioner with {len(self.bounds)} bounds "
+                            f"needs {len(self.bounds) + 1} shards, got {shards_count}.")
+        # Values are read from the sheet as strings, compare them as bounds
+        key = type(self.bounds[0])(key)
+        return bisect_right(self.bounds, key)
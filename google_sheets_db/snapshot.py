@@ -0,0 +1,182 @@
+import csv
+import os
+from typing import Any, Iterator
+
+FORMATS = {
+    '.parquet': 'parquet',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.csv': 'csv',
+}
+ARROW_TYPES = {
+    int: 'int64',
+    float: 'float64',
+    bool: 'bool_',
+    str: 'string',
+}
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise Exception("pyarrow is required for parquet and arrow snapshots: "
+                        "pip install google-sheets-db[arrow]")
+    return pyarrow
+
+
+def guess_format(path: str, format: str = None) -> str:
+    if format:
+        if format not in FORMATS.values():
+            raise Exception(f"Unknown snapshot format: {format}. Use one of: parquet, arrow, csv.")
+        return format
+    return FORMATS.get(os.path.splitext(path)[1].lower(), 'parquet')
+
+
+def arrow_schema(model):
+    """Returns arrow schema of the model, fields of unknown types are kept as strings"""
+    pa = import_pyarrow()
+    return pa.schema([
+        pa.field(field.name, getattr(pa, ARROW_TYPES.get(field.field_type, 'string'))())
+        for field in model._columns
+    ])
+
+
+def python_value(field, value: Any) -> Any:
+    """Converts a value to the field type if it has an arrow type, other values are kept as strings"""
+    if field.field_type in ARROW_TYPES:
+        return field.to_python(value)
+    return None if value in (None, '') else str(value)
+
+
+def read_chunks(model, chunk_size: int) -> Iterator[list[dict[str, Any]]]:
+    """
+    Yields not empty rows of the sheet as named typed values by chunks
+
+    Sharded sheets are read shard by shard. Calls API once per chunk and once to refresh metadata.
+    """
+    for shard in model._shards or [model]:
+        # Grid could be grown by others since metadata was cached
+        shard._db.refresh()
+        grid_rows = max(shard._grid_rows(), 1)
+        for first_index in range(1, grid_rows + 1, chunk_size):
+            last_index = first_index + chunk_size - 1
+            if last_index < grid_rows:
+                range_name = shard._rows_range(first_index, last_index)
+            else:
+                # The last chunk is open-ended, so rows added after the refresh are read too
+                start = shard.cell_a1(shard._sheet_start_column, shard._row_number(first_index))
+                range_name = f'{start}:{shard.cell_a1(shard._sheet_start_column + shard.last_column_number)}'
+            values = shard.get_range_values(range_name)[0]
+            rows = []
+            for row in values:
+                if not any(value not in (None, '') for value in row):
+                    continue
+                rows.append({
+                    field.name: python_value(field, row[field.order_number - 1]) if len(row) >= field.order_number
+                    else None
+                    for field in shard._columns
+                })
+            if rows:
+                yield rows
+
+
+def export_sheet(model, path: str, format: str = None, chunk_size: int = 5000) -> int:
+    format = guess_format(path, format)
+    names = [field.name for field in model._columns]
+    written = 0
+
+    if format == 'csv':
+        with open(path, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=names)
+            writer.writeheader()
+            for rows in read_chunks(model, chunk_size):
+                writer.writerows(rows)
+                written += len(rows)
+        return written
+
+    pa = import_pyarrow()
+    schema = arrow_schema(model)
+    if format == 'parquet':
+        writer = pa.parquet.ParquetWriter(path, schema)
+    else:
+        writer = pa.ipc.new_file(path, schema)
+    try:
+        for rows in read_chunks(model, chunk_size):
+            columns = [[row[name] for row in rows] for name in names]
+            # Values of fields with unknown types are kept as strings
+            columns = [column if field.field_type in ARROW_TYPES else
+                       [None if value is None else str(value) for value in column]
+                       for field, column in zip(model._columns, columns)]
+            writer.write_batch(pa.RecordBatch.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema))
+            written += len(rows)
+    finally:
+        writer.close()
+    return written
+
+
+def read_file_chunks(path: str, format: str, chunk_size: int) -> Iterator[list[dict[str, Any]]]:
+    """Yields rows of a file as dicts by chunks"""
+    if format == 'csv':
+        with open(path, newline='') as file:
+            rows = []
+            for row in csv.DictReader(file):
+                rows.append({name: value if value != '' else None for name, value in row.items()})
+                if len(rows) >= chunk_size:
+                    yield rows
+                    rows = []
+            if rows:
+                yield rows
+        return
+
+    pa = import_pyarrow()
+    if format == 'parquet':
+        batches = pa.parquet.ParquetFile(path).iter_batches(batch_size=chunk_size)
+    else:
+        reader = pa.ipc.open_file(path)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    for batch in batches:
+        for offset in range(0, batch.num_rows, chunk_size):
+            yield batch.slice(offset, chunk_size).to_pylist()
+
+
+def cell_value(value: Any) -> Any:
+    """Converts a file value to a value accepted by the sheet"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def load_sheet(model, path: str, format: str = None, chunk_size: int = 5000, truncate: bool = False) -> int:
+    format = guess_format(path, format)
+    if truncate:
+        model.truncate()
+    # Shard -> index of the next free row, counted on first write to the shard
+    next_indexes = {}
+    written = 0
+    for rows in read_file_chunks(path, format, chunk_size):
+        by_shard = {}
+        for row in rows:
+            shard = model._shard_for(model._pk_of(row)) if model._shards else model
+            values = shard.init_list_row()
+            for field in shard._columns:
+                values[field.order_number - 1] = cell_value(python_value(field, row.get(field.name)))
+            by_shard.setdefault(shard, []).append(values)
+        for shard, values in by_shard.items():
+            if shard not in next_indexes:
+                next_indexes[shard] = shard.count() + 1
+            first_index = next_indexes[shard]
+            last_row = shard._row_number(first_index + len(values) - 1)
+            if last_row > shard._sheet.row_count:
+                shard.add_rows(last_row - shard._sheet.row_count)
+            shard.write_ranges([{
+                'range': shard._rows_range(first_index, first_index + len(values) - 1),
+                'values': values,
+            }])
+            next_indexes[shard] += len(values)
+            written += len(values)
+    model.reset_indexes()
+    return written
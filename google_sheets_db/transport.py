@@ -0,0 +1,325 @@
+import re
+from itertools import count
+from threading import RLock
+from typing import Any, Optional
+
+from gspread.models import Worksheet
+from gspread.utils import a1_to_rowcol, absolute_range_name, quote, rowcol_to_a1
+
+SHEETS_API_URL = 'https://sheets.googleapis.com/v4/spreadsheets/%s'
+
+
+class Transport:
+    """
+    Spreadsheet I/O used by the database and models
+
+    Ranges are absolute A1 ranges, e.g. `'Sheet1'!A1:C`.
+    Worksheets are objects with `id`, `title`, `row_count` and `col_count` attributes.
+    """
+    db = None
+    # Whether formulas are calculated by `evaluate`
+    supports_formulas = False
+
+    def bind(self, db) -> None:
+        """Binds transport to the database it serves"""
+        self.db = db
+
+    def worksheets(self) -> list:
+        """Fetches worksheets metadata"""
+        raise NotImplementedError
+
+    def add_worksheet(self, title: str, rows: int, cols: int):
+        raise NotImplementedError
+
+    def del_worksheet(self, worksheet) -> None:
+        raise NotImplementedError
+
+    def batch_get(self, ranges: list[str]) -> list[list[list[Any]]]:
+        """Returns values of every range, empty ranges as empty lists"""
+        raise NotImplementedError
+
+    def batch_update(self, data: list[dict[str, Any]]) -> Any:
+        """Writes values, data is a list of `{'range': ..., 'values': [[...]]}`"""
+        raise NotImplementedError
+
+    def insert_rows(self, worksheet, values: list[list[Any]], row: int) -> Any:
+        """Inserts rows before the row number shifting the rest down"""
+        raise NotImplementedError
+
+    def add_rows(self, worksheet, rows: int) -> Any:
+        """Adds empty rows to the end of the worksheet grid"""
+        raise NotImplementedError
+
+    def clear(self, range_name: str) -> Any:
+        raise NotImplementedError
+
+    def append(self, range_name: str, values: list[list[Any]]) -> str:
+        """Appends rows after the last not empty row of the range, returns the A1 range they were written to"""
+        raise NotImplementedError
+
+    def evaluate(self, range_name: str, formulas: list[str]) -> list[Any]:
+        """Calculates formulas in a scratch row range, clears it and returns the results"""
+        raise NotImplementedError
+
+
+class GspreadTransport(Transport):
+    """Default transport, uses gspread models"""
+    supports_formulas = True
+
+    @property
+    def spreadsheet(self):
+        return self.db.spreadsheet
+
+    def worksheets(self) -> list[Worksheet]:
+        params = {'includeGridData': 'false', 'fields': 'sheets.properties'}
+        metadata = self.spreadsheet.fetch_sheet_metadata(params=params)
+        return [Worksheet(self.spreadsheet, sheet['properties']) for sheet in metadata.get('sheets', [])]
+
+    def add_worksheet(self, title: str, rows: int, cols: int) -> Worksheet:
+        return self.spreadsheet.add_worksheet(title=title, rows=str(rows), cols=str(cols))
+
+    def del_worksheet(self, worksheet) -> None:
+        self.spreadsheet.del_worksheet(worksheet)
+
+    def batch_get(self, ranges: list[str]) -> list[list[list[Any]]]:
+        response = self.spreadsheet.values_batch_get(ranges=ranges)
+        return [value_range.get('values', []) for value_range in response['valueRanges']]
+
+    def batch_update(self, data: list[dict[str, Any]]) -> Any:
+        body = {'valueInputOption': 'RAW', 'data': data}
+        return self.spreadsheet.values_batch_update(body=body)
+
+    def insert_rows(self, worksheet, values: list[list[Any]], row: int) -> Any:
+        return worksheet.insert_rows(values, row=row)
+
+    def add_rows(self, worksheet, rows: int) -> Any:
+        # Rows are appended relatively, a resize to a count from stale metadata could shrink the grid
+        body = {'requests': [{'appendDimension': {'sheetId': worksheet.id, 'dimension': 'ROWS', 'length': rows}}]}
+        response = self.spreadsheet.batch_update(body)
+        worksheet._properties['gridProperties']['rowCount'] += rows
+        return response
+
+    def clear(self, range_name: str) -> Any:
+        return self.spreadsheet.values_clear(range_name)
+
+    def append(self, range_name: str, values: list[list[Any]]) -> str:
+        params = {'valueInputOption': 'RAW', 'insertDataOption': 'INSERT_ROWS'}
+        response = self.spreadsheet.values_append(range_name, params=params, body={'values': values})
+        return response['updates']['updatedRange']
+
+    def evaluate(self, range_name: str, formulas: list[str]) -> list[Any]:
+        body = {
+            'valueInputOption': 'USER_ENTERED',
+            'includeValuesInResponse': True,
+            'responseValueRenderOption': 'UNFORMATTED_VALUE',
+            'data': [{'range': range_name, 'values': [formulas]}],
+        }
+        response = self.spreadsheet.values_batch_update(body=body)
+        self.clear(range_name)
+        values = response['responses'][0].get('updatedData', {}).get('values') or [[]]
+        return values[0] + [''] * (len(formulas) - len(values[0]))
+
+
+class ValuesApiTransport(GspreadTransport):
+    """
+    Transport calling Sheets API v4 values endpoints directly
+
+    Values are requested unformatted, so numbers and booleans are returned as native types,
+    responses are gzipped and reduced with field masks.
+    Metadata and structural changes still go through gspread.
+    """
+    HEADERS = {'Accept-Encoding': 'gzip', 'User-Agent': 'google-sheets-db (gzip)'}
+
+    def __init__(self, value_render_option: str = 'UNFORMATTED_VALUE',
+                 date_time_render_option: str = 'FORMATTED_STRING'):
+        self.value_render_option = value_render_option
+        self.date_time_render_option = date_time_render_option
+
+    def _request(self, method: str, endpoint: str, params=None, json=None) -> dict:
+        url = SHEETS_API_URL % self.db.spreadsheet_id + endpoint
+        response = self.spreadsheet.client.request(method, url, params=params, json=json, headers=self.HEADERS)
+        return response.json()
+
+    def batch_get(self, ranges: list[str]) -> list[list[list[Any]]]:
+        params = [('ranges', range_name) for range_name in ranges]
+        params += [
+            ('majorDimension', 'ROWS'),
+            ('valueRenderOption', self.value_render_option),
+            ('dateTimeRenderOption', self.date_time_render_option),
+            ('fields', 'valueRanges(values)'),
+        ]
+        response = self._request('get', '/values:batchGet', params=params)
+        value_ranges = response.get('valueRanges', [])
+        # Masked response may skip trailing empty ranges
+        value_ranges += [{}] * (len(ranges) - len(value_ranges))
+        return [value_range.get('values', []) for value_range in value_ranges]
+
+    def batch_update(self, data: list[dict[str, Any]]) -> Any:
+        body = {'valueInputOption': 'RAW', 'data': data}
+        return self._request('post', '/values:batchUpdate', params={'fields': 'totalUpdatedCells'}, json=body)
+
+    def clear(self, range_name: str) -> Any:
+        return self._request('post', f'/values/{quote(range_name)}:clear')
+
+
+class MemoryWorksheet:
+    """Worksheet of MemoryTransport"""
+
+    def __init__(self, sheet_id: int, title: str, rows: int, cols: int):
+        self.id = sheet_id
+        self.title = title
+        self.row_count = rows
+        self.col_count = cols
+        self.values: list[list[Any]] = []
+
+    def __repr__(self):
+        return f'MemoryWorksheet({self.title!r})'
+
+
+def split_range(range_name: str) -> tuple[str, Optional[str]]:
+    """Splits absolute A1 range into a sheet title and a range"""
+    match = re.fullmatch(r"'((?:[^']|'')*)'(?:!(.*))?", range_name)
+    if match:
+        return match.group(1).replace("''", "'"), match.group(2)
+    title, _, cells = range_name.partition('!')
+    return title, cells or None
+
+
+class MemoryTransport(Transport):
+    """
+    Keeps spreadsheet in memory, for tests and offline work
+
+    Values are returned as strings, like the default transport does, unless `unformatted` is set.
+    Grid is expanded on writes.
+    """
+
+    def __init__(self, unformatted: bool = False):
+        self.unformatted = unformatted
+        self.sheets: dict[str, MemoryWorksheet] = {}
+        self._ids = count()
+        self._lock = RLock()
+
+    def worksheets(self) -> list[MemoryWorksheet]:
+        return list(self.sheets.values())
+
+    def add_worksheet(self, title: str, rows: int, cols: int) -> MemoryWorksheet:
+        with self._lock:
+            if title in self.sheets:
+                raise Exception(f'A sheet with the name "{title}" already exists.')
+            self.sheets[title] = MemoryWorksheet(next(self._ids), title, int(rows), int(cols))
+            return self.sheets[title]
+
+    def del_worksheet(self, worksheet) -> None:
+        with self._lock:
+            self.sheets.pop(worksheet.title, None)
+
+    def _locate(self, range_name: str) -> tuple[MemoryWorksheet, int, int, Optional[int], Optional[int]]:
+        """Returns worksheet and 1-based bounds of the range, open bounds are None"""
+        title, cells = split_range(range_name)
+        if title not in self.sheets:
+            raise Exception(f'Unable to parse range: {range_name}')
+        sheet = self.sheets[title]
+        if not cells:
+            return sheet, 1, 1, None, None
+        start, _, end = cells.partition(':')
+        first_row, first_col = self._parse_cell(start)
+        if not end:
+            return sheet, first_row or 1, first_col or 1, first_row or None, first_col or None
+        last_row, last_col = self._parse_cell(end)
+        return sheet, first_row or 1, first_col or 1, last_row or None, last_col or None
+
+    @staticmethod
+    def _parse_cell(label: str) -> tuple[int, int]:
+        letters, digits = re.fullmatch(r'([A-Za-z]*)(\d*)', label).groups()
+        if letters and digits:
+            return a1_to_rowcol(label.upper())
+        col = a1_to_rowcol(f'{letters.upper()}1')[1] if letters else 0
+        return int(digits or 0), col
+
+    def _render(self, value: Any) -> Any:
+        if self.unformatted:
+            return value
+        if isinstance(value, bool):
+            return 'TRUE' if value else 'FALSE'
+        return str(value)
+
+    def batch_get(self, ranges: list[str]) -> list[list[list[Any]]]:
+        result = []
+        with self._lock:
+            for range_name in ranges:
+                sheet, first_row, first_col, last_row, last_col = self._locate(range_name)
+                rows = sheet.values[first_row - 1:last_row]
+                values = []
+                for row in rows:
+                    row = row[first_col - 1:last_col]
+                    while row and row[-1] in (None, ''):
+                        row = row[:-1]
+                    values.append(['' if value is None else self._render(value) for value in row])
+                # Empty trailing rows are not returned
+                while values and not values[-1]:
+                    values.pop()
+                result.append(values)
+        return result
+
+    def batch_update(self, data: list[dict[str, Any]]) -> Any:
+        updated = 0
+        with self._lock:
+            for item in data:
+                sheet, first_row, first_col, _, _ = self._locate(item['range'])
+                for i, row in enumerate(item['values']):
+                    for j, value in enumerate(row):
+                        # Null values are skipped
+                        if value is None:
+                            continue
+                        self._set(sheet, first_row + i, first_col + j, value)
+                        updated += 1
+        return {'totalUpdatedCells': updated}
+
+    def insert_rows(self, worksheet, values: list[list[Any]], row: int) -> Any:
+        with self._lock:
+            sheet = self.sheets[worksheet.title]
+            while len(sheet.values) < row - 1:
+                sheet.values.append([])
+            sheet.values[row - 1:row - 1] = [list(values_row) for values_row in values]
+            sheet.row_count += len(values)
+        return None
+
+    def add_rows(self, worksheet, rows: int) -> Any:
+        with self._lock:
+            self.sheets[worksheet.title].row_count += rows
+        return None
+
+    def clear(self, range_name: str) -> Any:
+        with self._lock:
+            sheet, first_row, first_col, last_row, last_col = self._locate(range_name)
+            for row in sheet.values[first_row - 1:last_row]:
+                for j in range(first_col - 1, min(len(row), last_col or len(row))):
+                    row[j] = None
+        return None
+
+    def append(self, range_name: str, values: list[list[Any]]) -> str:
+        with self._lock:
+            sheet, first_row, first_col, _, _ = self._locate(range_name)
+            row = len(sheet.values)
+            while row >= first_row and not any(value not in (None, '') for value in sheet.values[row - 1]):
+                row -= 1
+            row = max(row + 1, first_row)
+            for i, values_row in enumerate(values):
+                for j, value in enumerate(values_row):
+                    if value is not None:
+                        self._set(sheet, row + i, first_col + j, value)
+            width = max([len(values_row) for values_row in values] + [1])
+            start = rowcol_to_a1(row, first_col)
+            end = rowcol_to_a1(row + len(values) - 1, first_col + width - 1)
+            return absolute_range_name(sheet.title, f'{start}:{end}')
+
+    @staticmethod
+    def _set(sheet: MemoryWorksheet, row: int, col: int, value: Any) -> None:
+        while len(sheet.values) < row:
+            sheet.values.append([])
+        values_row = sheet.values[row - 1]
+        while len(values_row) < col:
+            values_row.append(None)
+        values_row[col - 1] = value
+        sheet.row_count = max(sheet.row_count, row)
+        sheet.col_count = max(sheet.col_count, col)
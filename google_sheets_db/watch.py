@@ -0,0 +1,169 @@
+import hashlib
+import json
+import logging
+import time
+from queue import Queue, Empty, Full
+from threading import Event, RLock, Thread
+from typing import Any, Callable, Hashable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RowChanges:
+    """Rows changed between two reads of a sheet, keyed by primary key"""
+
+    def __init__(self, inserted: list = None, updated: list = None, deleted: list = None):
+        self.inserted = inserted or []
+        self.updated = updated or []
+        self.deleted = deleted or []
+
+    def __repr__(self):
+        return f'RowChanges(inserted={len(self.inserted)}, updated={len(self.updated)}, deleted={len(self.deleted)})'
+
+    def __bool__(self):
+        return bool(self.inserted or self.updated or self.deleted)
+
+
+class Watcher:
+    """
+    Periodically re-reads a sheet in a background thread and publishes changed rows
+
+    Changes are passed to `on_change` callbacks and can be consumed by iterating the watcher.
+    The last read rows are kept in memory and served by `records()` within the allowed staleness.
+    """
+
+    def __init__(self, model, interval: float = 60, on_change: Callable[[RowChanges], Any] = None,
+                 max_queue: int = 100):
+        self.model = model
+        self.interval = interval
+        self.callbacks = [on_change] if on_change else []
+        self.error: Optional[Exception] = None
+        self._queue = Queue(maxsize=max_queue)
+        self._records = []
+        # Primary key -> (row values, record) of the last read
+        self._rows: dict[Hashable, tuple[list[Any], Any]] = {}
+        self._digest = None
+        self._read_at = None
+        self._lock = RLock()
+        self._stopped = Event()
+        self._thread = None
+
+    def __repr__(self):
+        return f'Watcher({self.model.__name__}, interval={self.interval})'
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def __iter__(self) -> Iterator[RowChanges]:
+        """Yields changes until the watcher is stopped"""
+        while not self._stopped.is_set() or not self._queue.empty():
+            try:
+                yield self._queue.get(timeout=min(self.interval, 1))
+            except Empty:
+                continue
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    @property
+    def age(self) -> Optional[float]:
+        """Seconds since the last read, None if the sheet was not read yet"""
+        if self._read_at is None:
+            return None
+        return time.monotonic() - self._read_at
+
+    def start(self) -> 'Watcher':
+        if self.running:
+            return self
+        self._stopped.clear()
+        self._thread = Thread(target=self._run, name=repr(self), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join()
+        if self.model._watcher is self:
+            self.model._watcher = None
+
+    def invalidate(self) -> None:
+        """Makes the next `records()` call read the sheet, used after writes of the library"""
+        with self._lock:
+            self._read_at = None
+
+    def records(self, max_staleness: float = None) -> list:
+        """
+        Returns rows read not earlier than `max_staleness` seconds ago
+
+        Reads the sheet if the kept rows are older. Without `max_staleness` any kept rows are returned.
+        Every call returns new instances, so changes of the caller do not reach the kept rows.
+        """
+        with self._lock:
+            age = self.age
+            if age is None or (max_staleness is not None and age > max_staleness):
+                self.refresh()
+            return [type(record)(_index=record._index, **record._data) for record in self._records]
+
+    def refresh(self) -> RowChanges:
+        """
+        Reads the sheet and publishes changes
+
+        Calls API.
+        """
+        records = self.model.get_table_records()
+        digest = hashlib.sha1(json.dumps([record.values() for record in records], default=str).encode()).digest()
+        with self._lock:
+            self._read_at = time.monotonic()
+            # Nothing changed, skip diffing
+            if digest == self._digest:
+                return RowChanges()
+            first_read = self._digest is None
+            changes = self._diff(records)
+            self._records = records
+            self._digest = digest
+        if changes and not first_read:
+            self._publish(changes)
+        return changes
+
+    def _diff(self, records: list) -> RowChanges:
+        rows = {}
+        for record in records:
+            key = self.model._pk_key(record.pk)
+            if key is not None:
+                rows[key] = (record.values(), record)
+        changes = RowChanges(
+            inserted=[record for key, (values, record) in rows.items() if key not in self._rows],
+            updated=[record for key, (values, record) in rows.items()
+                     if key in self._rows and self._rows[key][0] != values],
+            deleted=[record for key, (values, record) in self._rows.items() if key not in rows],
+        )
+        self._rows = rows
+        return changes
+
+    def _publish(self, changes: RowChanges) -> None:
+        try:
+            self._queue.put_nowait(changes)
+        except Full:
+            # Drop the oldest changes, nobody consumes them
+            self._queue.get_nowait()
+            self._queue.put_nowait(changes)
+        for callback in self.callbacks:
+            try:
+                callback(changes)
+            except Exception:
+                logger.exception(f"Change callback of {self.model.__name__} failed.")
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self.refresh()
+                self.error = None
+            except Exception as exc:
+                self.error = exc
+                logger.exception(f"Refreshing of {self.model.__name__} failed.")
+            self._stopped.wait(self.interval)
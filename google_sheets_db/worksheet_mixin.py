@@ -1,6 +1,9 @@
 from typing import Any
 
-from gspread.models import Spreadsheet, Worksheet
+from gspread.utils import absolute_range_name, rowcol_to_a1
+
+from google_sheets_db.database import GoogleSheetsDB
+from google_sheets_db.transport import Transport
 
 
 def check_spreadsheet(func):
@@ -20,32 +23,75 @@ def check_sheet(func):
 
 
 class WorksheetMixin:
-    _db: Spreadsheet
-    _sheet: Worksheet
+    _db: GoogleSheetsDB
+    _sheet: Any
+
+    @classmethod
+    def _transport(cls) -> Transport:
+        return cls._db.transport
+
+    @classmethod
+    def _absolute_range(cls, range_name: str = None) -> str:
+        return absolute_range_name(cls._sheet.title, range_name)
 
     @classmethod
     @check_sheet
     def get_all_values(cls) -> list[list[Any]]:
         """Returns all shet values"""
-        return cls._sheet.get_all_values()
+        return cls._transport().batch_get([cls._absolute_range()])[0]
 
     @classmethod
     @check_sheet
     def get_range_values(cls, *ranges) -> list[list[list[Any]]]:
-        """Returns all sheet values"""
-        try:
-            return cls._sheet.batch_get(ranges)
-        except KeyError as exc:
-            if exc.args == ('values',):
-                return [[]]
-            raise
+        """
+        Returns values of every range
+
+        Empty ranges are returned as empty lists. Calls API once.
+        """
+        cls._db.throttle()
+        return cls._transport().batch_get([cls._absolute_range(r) for r in ranges])
 
     @classmethod
     @check_sheet
     def get_column_values(cls, order_number: int) -> list[Any]:
-        return cls._sheet.col_values(order_number)
+        column = rowcol_to_a1(1, order_number)[:-1]
+        values = cls.get_range_values(f'{column}:{column}')[0]
+        return [row[0] if row else '' for row in values]
+
+    @classmethod
+    @check_sheet
+    def write_ranges(cls, data: list[dict[str, Any]]) -> Any:
+        """
+        Writes values to ranges of the sheet
+
+        Calls API once.
+        """
+        return cls._db.write([dict(item, range=cls._absolute_range(item['range'])) for item in data])
+
+    @classmethod
+    @check_sheet
+    def insert_rows(cls, rows: list[list[Any]], row: int) -> Any:
+        """Inserts rows before the row number shifting the rest down"""
+        return cls._transport().insert_rows(cls._sheet, rows, row)
+
+    @classmethod
+    @check_sheet
+    def append_values(cls, range_name: str, values: list[list[Any]]) -> str:
+        """
+        Appends rows after the last not empty row of the range without reading it
+
+        Returns the absolute A1 range the rows were written to. Calls API once.
+        """
+        cls._db.throttle()
+        return cls._transport().append(cls._absolute_range(range_name), values)
+
+    @classmethod
+    @check_sheet
+    def add_rows(cls, rows: int) -> Any:
+        """Adds empty rows to the end of the sheet grid"""
+        return cls._transport().add_rows(cls._sheet, rows)
 
     @classmethod
     @check_sheet
     def truncate(cls):
-        return cls._sheet.clear()
+        return cls._db.clear_range(cls._absolute_range())
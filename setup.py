@@ -29,5 +29,8 @@ setup(
         "pandas>=1.3.1",
         "deprecation==2.1.0"
     ],
+    extras_require={
+        "arrow": ["pyarrow"],
+    },
     include_package_data=True,
 )
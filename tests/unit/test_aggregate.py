@@ -0,0 +1,93 @@
+from unittest import main, TestCase
+
+from google_sheets_db import GoogleSheetsDB, BaseSheet, PrimaryKey, Field
+from google_sheets_db.transport import MemoryTransport
+
+
+class FormulaTransport(MemoryTransport):
+    """Memory transport recording formulas instead of calculating them"""
+    supports_formulas = True
+
+    def __init__(self):
+        super().__init__()
+        self.evaluated = []
+
+    def evaluate(self, range_name, formulas):
+        self.evaluated.append((range_name, formulas))
+        return [len(formula) for formula in formulas]
+
+
+class Invoices(BaseSheet):
+    meta = {
+        'start_row': 2,
+    }
+    id = PrimaryKey()
+    status = str
+    amount = Field(float)
+
+
+class ShardedInvoices(BaseSheet):
+    meta = {
+        'shards': ['Invoices_1', 'Invoices_2'],
+    }
+    id = PrimaryKey()
+    status = str
+    amount = Field(float)
+
+
+class AggregateTests(TestCase):
+
+    def setUp(self):
+        self.transport = MemoryTransport()
+        self.db = GoogleSheetsDB('memory', transport=self.transport)
+        Invoices.create_sheet_if_not_exists()
+        for status, amount in [('paid', 10), ('paid', 5.5), ('new', 100), ('paid', '')]:
+            Invoices.insert(status=status, amount=amount)
+
+    def tearDown(self):
+        Invoices.drop()
+        self.db.close()
+
+    def test_client_side(self):
+        result = Invoices.aggregate(count='amount', sum='amount', max='amount', where={'status': 'paid'})
+        self.assertDictEqual(result, {'count': 2, 'sum': 15.5, 'max': 10.0})
+        self.assertDictEqual(Invoices.aggregate(count='id', avg='amount'), {'count': 4, 'avg': 115.5 / 3})
+        # Criteria ignore case like Google functions do
+        self.assertDictEqual(Invoices.aggregate(count='id', where={'status': 'PAID'}), {'count': 3})
+        self.assertDictEqual(Invoices.aggregate(count='id', where={'status': 'pa*'}), {'count': 0})
+
+    def test_unknown_function(self):
+        with self.assertRaisesRegex(Exception, 'Unknown aggregate function: median'):
+            Invoices.aggregate(median='amount')
+
+    def test_formulas(self):
+        transport = FormulaTransport()
+        db = GoogleSheetsDB('formulas', transport=transport)
+        try:
+            Invoices.meta['spreadsheet_id'] = 'formulas'
+            Invoices.create_sheet_if_not_exists()
+            result = Invoices.aggregate(count='id', sum='amount', where={'status': 'pa"i*d?~'})
+            range_name, formulas = transport.evaluated[0]
+            self.assertEqual(range_name, "'_google_sheets_db'!A1:B1")
+            self.assertListEqual(formulas, [
+                '=IFERROR(COUNTIFS(\'Invoices\'!A2:A, "<>", \'Invoices\'!B2:B, "=pa""i~*d~?~~"), "")',
+                '=IFERROR(SUMIFS(\'Invoices\'!C2:C, \'Invoices\'!B2:B, "=pa""i~*d~?~~"), "")',
+            ])
+            self.assertDictEqual(result, {'count': len(formulas[0]), 'sum': len(formulas[1])})
+            Invoices.aggregate(max='amount')
+            self.assertEqual(transport.evaluated[1][1], ['=IFERROR(MAX(\'Invoices\'!C2:C), "")'])
+        finally:
+            Invoices.meta.pop('spreadsheet_id')
+            db.close()
+
+    def test_sharded(self):
+        ShardedInvoices.create_sheet_if_not_exists()
+        for pk, amount in [(1, 10), (2, 20), (3, 30), (4, 0)]:
+            ShardedInvoices.insert(id=pk, status='paid', amount=amount)
+        result = ShardedInvoices.aggregate(count='id', sum='amount', min='amount', avg='amount')
+        self.assertDictEqual(result, {'count': 4, 'sum': 60.0, 'min': 0.0, 'avg': 15.0})
+        ShardedInvoices.drop()
+
+
+if __name__ == '__main__':
+    main()
@@ -15,6 +15,13 @@ class Sheet2(BaseSheet):
     first_name = str
 
 
+class Sheet3(BaseSheet):
+    id = PrimaryKey()
+    email = Field(str, unique=True)
+    status = Field(str, index=True)
+    comment = str
+
+
 class BaseSheetTests(TestCase):
 
     def test_init_list_row(self):
@@ -55,6 +62,45 @@ class BaseSheetTests(TestCase):
         self.assertEqual(row.first_name, 'Name')
         self.assertEqual(row.last_name, 'Surname')
 
+    def test_indexed_fields(self):
+        self.assertListEqual([f.name for f in Sheet3._indexed_fields], ['email', 'status'])
+        self.assertTrue(Sheet3.email.unique)
+        self.assertFalse(Sheet3.status.unique)
+
+    def test_find_by_not_indexed(self):
+        with self.assertRaisesRegex(Exception, 'None of the fields is indexed: comment.'):
+            Sheet3.find_by(comment='text')
+
+    def test_dirty_fields(self):
+        row = Sheet(first_name='Name')
+        self.assertSetEqual(row._dirty, {'id', 'first_name', 'last_name'})
+        row = Sheet._from_row(['1', 'Name', 'Surname'], _index=1)
+        self.assertSetEqual(row._dirty, set())
+        row.last_name = 'Surname'
+        self.assertSetEqual(row._dirty, set())
+        row.last_name = 'Other'
+        self.assertSetEqual(row._dirty, {'last_name'})
+
+    def test_cells_ranges(self):
+        ranges = Sheet._cells_ranges({3: {'first_name': 'Name', 'last_name': 'Surname'}})
+        self.assertListEqual(ranges, [{'range': 'B3:C3', 'values': [['Name', 'Surname']]}])
+        # Not adjacent columns are written separately
+        ranges = Sheet._cells_ranges({3: {'id': 1, 'last_name': 'Surname'}})
+        self.assertListEqual(ranges, [{'range': 'A3:A3', 'values': [[1]]},
+                                      {'range': 'C3:C3', 'values': [['Surname']]}])
+        # Same columns of adjacent rows are merged
+        ranges = Sheet._cells_ranges({
+            2: {'last_name': 'Surname'},
+            3: {'last_name': 'Other'},
+            5: {'last_name': 'Third'},
+        })
+        self.assertListEqual(ranges, [{'range': 'C2:C3', 'values': [['Surname'], ['Other']]},
+                                      {'range': 'C5:C5', 'values': [['Third']]}])
+
+    def test_cells_ranges_gaps(self):
+        ranges = Sheet2._cells_ranges({1: {'last_name': 'Surname'}})
+        self.assertListEqual(ranges, [{'range': 'E1:E1', 'values': [['Surname']]}])
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,104 @@
+import time
+from threading import Thread
+from unittest import main, TestCase
+
+from google_sheets_db import GoogleSheetsDB, BaseSheet, PrimaryKey
+from google_sheets_db.transport import MemoryTransport
+
+
+class Jobs(BaseSheet):
+    id = PrimaryKey()
+    status = str
+
+
+class QuotaError(Exception):
+    pass
+
+
+class WriteBatcherTests(TestCase):
+
+    def setUp(self):
+        self.transport = MemoryTransport()
+        self.db = GoogleSheetsDB('memory', transport=self.transport, batch_window=0.1)
+        Jobs.create_sheet_if_not_exists()
+        Jobs.insert_many(*[{'status': 'new'} for i in range(20)])
+        self.calls = []
+        batch_update = self.transport.batch_update
+        self.transport.batch_update = lambda data: self.calls.append(data) or batch_update(data)
+
+    def tearDown(self):
+        Jobs.drop()
+        self.db.close()
+
+    def run_threads(self, target, count=20):
+        errors = []
+
+        def run(i):
+            try:
+                target(i)
+            except Exception as exc:
+                errors.append(exc)
+        threads = [Thread(target=run, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return errors
+
+    def test_writes_are_merged(self):
+        errors = self.run_threads(lambda i: Jobs.update_with_index(i + 1, status=f'done {i}'))
+        self.assertListEqual(errors, [])
+        self.assertLess(len(self.calls), 5)
+        self.assertEqual(sum(len(data) for data in self.calls), 20)
+        self.assertListEqual([row[1] for row in Jobs.get_table_values()], [f'done {i}' for i in range(20)])
+
+    def test_concurrent_inserts(self):
+        errors = self.run_threads(lambda i: Jobs.insert(status=f'insert {i}') if i % 2 else
+                                  Jobs(status=f'save {i}').save())
+        self.assertListEqual(errors, [])
+        rows = Jobs.get_table_values()
+        self.assertEqual(len(rows), 40)
+        # Every row got its own row and key
+        self.assertEqual(len({row[0] for row in rows}), 40)
+        self.assertSetEqual({row[1] for row in rows[20:]},
+                            {f'insert {i}' if i % 2 else f'save {i}' for i in range(20)})
+        self.assertLess(len(self.calls), 20)
+
+    def test_inserts_with_latency_are_merged(self):
+        # Reads of concurrent inserts overlap, so their writes arrive within one window
+        self.db.batcher.window = 0.02
+        batch_get = self.transport.batch_get
+        self.transport.batch_get = lambda ranges: time.sleep(0.05) or batch_get(ranges)
+        self.calls.clear()
+        errors = self.run_threads(lambda i: Jobs.insert(status=f'insert {i}'))
+        self.assertListEqual(errors, [])
+        self.assertLess(len(self.calls), 5)
+        self.assertEqual(len({row[0] for row in Jobs.get_table_values()}), 40)
+
+    def test_failed_insert_gives_rows_back(self):
+        def fail(data):
+            raise QuotaError()
+        batch_update = self.transport.batch_update
+        self.transport.batch_update = fail
+        with self.assertRaises(QuotaError):
+            Jobs.insert(status='lost')
+        self.transport.batch_update = batch_update
+        self.assertEqual(Jobs.insert(status='kept')._index, 21)
+
+    def test_max_rows(self):
+        self.db.batcher.max_rows = 5
+        self.run_threads(lambda i: Jobs.update_with_index(i + 1, status='done'))
+        self.assertGreaterEqual(len(self.calls), 4)
+        self.assertTrue(all(len(data) <= 5 for data in self.calls))
+
+    def test_errors_are_passed_to_callers(self):
+        def fail(data):
+            raise QuotaError()
+        self.transport.batch_update = fail
+        errors = self.run_threads(lambda i: Jobs.update_with_index(i + 1, status='done'), count=3)
+        self.assertEqual(len(errors), 3)
+        self.assertTrue(all(isinstance(error, QuotaError) for error in errors))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+from unittest import main, TestCase
+
+from google_sheets_db import GoogleSheetsDB, BaseSheet, PrimaryKey
+from google_sheets_db.transport import MemoryTransport
+
+
+class Visits(BaseSheet):
+    tenant_id = PrimaryKey(order=0)
+    date = PrimaryKey(field_type=str, order=1)
+    visits = int
+
+
+class Balances(BaseSheet):
+    date = str
+    tenant_id = str
+    amount = int
+    meta = {'primary_key': ('tenant_id', 'date')}
+
+
+class CompositePrimaryKeyTests(TestCase):
+
+    def setUp(self):
+        self.transport = MemoryTransport()
+        self.db = GoogleSheetsDB('memory', transport=self.transport)
+        Visits.create_sheet_if_not_exists()
+        Visits.insert(tenant_id=1, date='2026-10-01', visits=5)
+        Visits.insert(tenant_id=1, date='2026-10-02', visits=7)
+        Visits.insert(tenant_id=2, date='2026-10-01', visits=3)
+
+    def tearDown(self):
+        Visits.drop()
+        self.db.close()
+
+    def test_primary_fields(self):
+        self.assertListEqual([field.name for field in Visits.get_primary_fields()], ['tenant_id', 'date'])
+        self.assertListEqual([field.name for field in Balances.get_primary_fields()], ['tenant_id', 'date'])
+        with self.assertRaises(Exception):
+            Visits.get_primary_field()
+        self.assertIsNone(Visits.generate_pk())
+
+    def test_with_pk(self):
+        visit = Visits.with_pk((1, '2026-10-02'))
+        self.assertTupleEqual(visit.pk, ('1', '2026-10-02'))
+        self.assertEqual(visit.visits, '7')
+        self.assertEqual(visit._index, 2)
+        self.assertIsNone(Visits.with_pk((2, '2026-10-02')))
+        with self.assertRaises(Exception):
+            Visits.with_pk(1)
+
+    def test_uniqueness(self):
+        with self.assertRaises(Exception):
+            Visits.insert(tenant_id='1', date='2026-10-01', visits=1)
+        with self.assertRaises(Exception):
+            Visits.insert(tenant_id=3, visits=1)
+        with self.assertRaises(Exception):
+            Visits.update_with_index(3, date='2026-10-01', tenant_id=1)
+        # Changing a part of the key keeps the index consistent
+        Visits.update_with_index(3, date='2026-10-03')
+        self.assertEqual(Visits.with_pk((2, '2026-10-03'))._index, 3)
+        self.assertIsNone(Visits.with_pk((2, '2026-10-01')))
+
+    def test_update_and_save(self):
+        Visits.update_with_pk((2, '2026-10-01'), visits=4)
+        self.assertEqual(Visits.with_pk((2, '2026-10-01')).visits, '4')
+
+        visit = Visits(tenant_id=2, date='2026-10-01', visits=6)
+        visit.save()
+        self.assertEqual(visit._index, 3)
+        new_visit = Visits(tenant_id=2, date='2026-10-02', visits=1).save()
+        self.assertEqual(new_visit._index, 4)
+        self.assertListEqual([row[2] for row in Visits.get_table_values()], ['5', '7', '6', '1'])
+
+    def test_lookup_without_table_scan(self):
+        Visits.with_pk((1, '2026-10-01'))
+        calls = []
+        batch_get = self.transport.batch_get
+        self.transport.batch_get = lambda ranges: calls.append(ranges) or batch_get(ranges)
+        rows = Visits.update_or_insert({'pk': (1, '2026-10-02')}, {'visits': 8})
+        self.assertEqual(len(rows), 1)
+        rows = Visits.find_by(tenant_id=1, date='2026-10-02')
+        self.assertEqual(rows[0].visits, '8')
+        # Only the found rows are read
+        self.assertTrue(all(len(ranges) == 1 and ranges[0].endswith('2') for ranges in calls))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+from unittest import main, TestCase
+
+from google_sheets_db import GoogleSheetsDB, BaseSheet, PrimaryKey
+from google_sheets_db.transport import MemoryTransport, MemoryWorksheet
+
+
+class AnotherSheet(BaseSheet):
+    meta = {
+        'spreadsheet_id': 'another'
+    }
+
+
+class Items(BaseSheet):
+    id = PrimaryKey()
+    meta = {'spreadsheet_id': 'fresh'}
+
+
+class FreshWorksheetsTransport(MemoryTransport):
+    """Returns new worksheet objects on every fetch, like gspread does"""
+
+    def worksheets(self) -> list[MemoryWorksheet]:
+        return [MemoryWorksheet(sheet.id, sheet.title, sheet.row_count, sheet.col_count)
+                for sheet in self.sheets.values()]
+
+
+class GoogleSheetsDBTests(TestCase):
+
+    def test_lazy_connection(self):
+        # No credentials are needed until the spreadsheet is used
+        db = GoogleSheetsDB('lazy')
+        try:
+            self.assertFalse(db.closed)
+            self.assertIs(GoogleSheetsDB.get('lazy'), db)
+        finally:
+            db.close()
+        with self.assertRaisesRegex(Exception, 'Spreadsheet is closed.'):
+            db.get_sheets()
+        with self.assertRaisesRegex(Exception, 'Spreadsheet lazy is not declared.'):
+            GoogleSheetsDB.get('lazy')
+
+    def test_sheet_db(self):
+        with self.assertRaisesRegex(Exception, 'Spreadsheet another is not declared.'):
+            AnotherSheet._db  # noqa
+        db = GoogleSheetsDB('another')
+        try:
+            self.assertIs(AnotherSheet._db, db)
+        finally:
+            db.close()
+
+    def test_close_keeps_other_database(self):
+        first, second = GoogleSheetsDB('shared'), GoogleSheetsDB('shared')
+        try:
+            first.close()
+            self.assertIs(GoogleSheetsDB.get('shared'), second)
+        finally:
+            second.close()
+
+    def test_refresh_reaches_models(self):
+        transport = FreshWorksheetsTransport()
+        db = GoogleSheetsDB('fresh', transport=transport)
+        try:
+            Items.create_sheet_if_not_exists()
+            self.assertEqual(Items._sheet.row_count, 100)
+            transport.sheets['Items'].row_count = 160
+            db.refresh()
+            self.assertEqual(Items._sheet.row_count, 160)
+        finally:
+            Items.drop()
+            db.close()
+
+
+if __name__ == '__main__':
+    main()
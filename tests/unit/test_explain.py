@@ -0,0 +1,165 @@
+from threading import Thread
+from unittest import main, TestCase
+
+from google_sheets_db import GoogleSheetsDB, BaseSheet, Field, PrimaryKey
+from google_sheets_db.explain import RecordingTransport, is_full_scan
+from google_sheets_db.transport import MemoryTransport
+
+
+class Users(BaseSheet):
+    id = PrimaryKey()
+    email = Field(unique=True)
+    name = str
+
+
+class FormulaTransport(MemoryTransport):
+    supports_formulas = True
+
+    def __init__(self):
+        super().__init__()
+        self.evaluated = []
+
+    def evaluate(self, range_name, formulas):
+        self.evaluated.append((range_name, formulas))
+        return [0] * len(formulas)
+
+
+class ExplainTests(TestCase):
+
+    def setUp(self):
+        self.transport = MemoryTransport()
+        self.db = GoogleSheetsDB('memory', transport=self.transport)
+        Users.create_sheet_if_not_exists()
+        Users.insert_many(*[{'email': f'user{i}@example.com', 'name': f'User {i}'} for i in range(10)])
+
+    def tearDown(self):
+        Users.drop()
+        self.db.close()
+
+    def test_writes_are_recorded_only(self):
+        Users.find_by(email='user2@example.com')
+        plan = Users.explain(lambda: Users.update_or_insert({'email': 'user2@example.com'}, {'name': 'Ann'}))
+        self.assertEqual(Users.with_pk(3).name, 'User 2')
+        self.assertEqual(len(plan.reads), 1)
+        self.assertEqual(len(plan.writes), 1)
+        self.assertEqual(plan.writes[0].cells, 1)
+        self.assertEqual(plan.written_cells, 1)
+        self.assertListEqual(plan.scans, [])
+
+        plan = Users.explain(lambda: Users.insert(email='new@example.com', name='New'))
+        self.assertEqual(Users.count(), 10)
+        # The row of the dry run got into a copy of the index
+        Users.insert(email='new@example.com', name='New')
+        self.assertEqual(Users.count(), 11)
+
+    def test_full_scans_are_flagged(self):
+        plan = Users.explain(lambda: Users.update_or_insert({'name': 'User 5'}, {'name': 'Ann'}))
+        self.assertEqual(plan.api_calls, 2)
+        self.assertEqual(len(plan.scans), 1)
+        self.assertEqual(plan.read_cells, 30)
+        self.assertIn('O(N)', str(plan))
+
+        plan = Users.explain(lambda: Users.with_pk(2))
+        self.assertListEqual(plan.writes, [])
+        self.assertEqual(len(plan.reads), 2)
+        # The primary key column is scanned to find the row
+        self.assertTrue(plan.reads[0].full_scan)
+        self.assertFalse(plan.reads[1].full_scan)
+
+    def test_structural_changes(self):
+        class Drafts(BaseSheet):
+            id = PrimaryKey()
+            text = str
+
+        plan = Users.explain(lambda: (Drafts.create_sheet_if_not_exists(), Drafts.insert(text='a')))
+        # The table is read once for its end and taken keys
+        self.assertListEqual([call.op for call in plan.calls], ['add_worksheet', 'batch_get', 'batch_update'])
+        self.assertFalse(Drafts.exists())
+        self.assertIsNone(self.transport.sheets.get('Drafts'))
+
+    def test_instances_are_unchanged(self):
+        self.db.identity_map_size = 100
+        user = Users.with_pk(3)
+        user.name = 'Ann'
+        new = Users(email='new@example.com', name='New')
+        plan = Users.explain(lambda: (user.save(), new.save()))
+        self.assertEqual(len(plan.writes), 2)
+        self.assertSetEqual(user._dirty, {'name'})
+        self.assertIsNone(new.pk)
+        self.assertIsNone(new._index)
+
+        kept = Users.with_pk(4)
+        Users.explain(lambda: Users.update_with_pk(4, name='Bob'))
+        self.assertEqual(kept.name, 'User 3')
+
+        # Instances are saved for real after the dry run
+        user.save()
+        new.save()
+        self.assertEqual(Users.with_pk(3).name, 'Ann')
+        self.assertEqual(new.pk, 11)
+        self.assertEqual(Users.count(), 11)
+
+    def test_state_is_kept(self):
+        with self.db.scope():
+            user = Users.with_pk(2)
+            Users.find_by(email='user5@example.com')
+            calls = []
+            batch_get = self.transport.batch_get
+            self.transport.batch_get = lambda ranges: calls.append(ranges) or batch_get(ranges)
+            Users.explain(lambda: (Users.with_pk(1), Users.insert(email='new@example.com', name='New')))
+            calls.clear()
+            self.assertIs(Users.with_pk(2), user)
+            self.assertListEqual(calls, [])
+            # The index is not rebuilt, only the found row is read
+            self.assertEqual(Users.find_by(email='user5@example.com')[0]._index, 6)
+            self.assertListEqual(calls, [["'Users'!A6:D6"]])
+            self.assertListEqual(Users.find_by(email='new@example.com'), [])
+            self.assertEqual(Users.insert(email='new@example.com', name='New')._index, 11)
+
+    def test_other_threads_are_not_recorded(self):
+        def insert():
+            thread = Thread(target=Users.insert, kwargs={'email': 'thread@example.com', 'name': 'Thread'})
+            thread.start()
+            thread.join()
+            Users.insert_many(*[{'email': f'dry{i}@example.com'} for i in range(3)], chunk_size=1)
+
+        plan = Users.explain(insert)
+        # Chunks written by workers of the dry run are recorded, the write of another thread is sent
+        self.assertEqual(len(plan.writes), 3)
+        self.assertListEqual([user.name for user in Users.find_by(email='thread@example.com')], ['Thread'])
+        self.assertEqual(Users.count(), 11)
+
+    def test_formulas_are_not_sent(self):
+        self.db.transport = FormulaTransport()
+        self.db.transport.bind(self.db)
+        self.db.create_sheet_if_not_exists(self.db.SCRATCH_SHEET, rows=1, cols=26)
+        plan = Users.explain(lambda: Users.aggregate(count='id', where={'name': 'User 1'}))
+        self.assertListEqual(self.db.transport.evaluated, [])
+        self.assertListEqual([call.op for call in plan.calls], ['evaluate'])
+
+    def test_without_reads(self):
+        batch_get = self.transport.batch_get
+        self.transport.batch_get = lambda ranges: self.fail('Read is sent')
+        plan = Users.explain(lambda: Users.update_or_insert({'name': 'User 5'}, {'name': 'Ann'}), reads=False)
+        self.transport.batch_get = batch_get
+        # Nothing is found without reads, so a row is inserted
+        self.assertEqual(plan.calls[-1].op, 'batch_update')
+        self.assertEqual(len(plan.writes), 1)
+        self.assertEqual(plan.read_cells, 0)
+        self.assertEqual(Users.count(), 10)
+
+    def test_is_full_scan(self):
+        self.assertTrue(is_full_scan("'Users'!A1:C"))
+        self.assertTrue(is_full_scan("'Users'!B:B"))
+        self.assertTrue(is_full_scan("Users"))
+        self.assertFalse(is_full_scan("'Users'!A2:C5"))
+        self.assertFalse(is_full_scan("'Users'!A2"))
+
+    def test_without_transport(self):
+        recorder = RecordingTransport()
+        self.assertListEqual(recorder.batch_get(["'Users'!A1:C"]), [[]])
+        self.assertEqual(recorder.plan.api_calls, 1)
+
+
+if __name__ == '__main__':
+    main()
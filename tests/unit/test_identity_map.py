@@ -0,0 +1,77 @@
+import gc
+from threading import Thread
+from unittest import main, TestCase
+
+from google_sheets_db import GoogleSheetsDB, BaseSheet, PrimaryKey
+from google_sheets_db.identity_map import IdentityMap
+from google_sheets_db.transport import MemoryTransport
+
+
+class Customers(BaseSheet):
+    id = PrimaryKey()
+    name = str
+
+
+class IdentityMapTests(TestCase):
+
+    def setUp(self):
+        self.transport = MemoryTransport()
+        self.db = GoogleSheetsDB('memory', transport=self.transport)
+        Customers.create_sheet_if_not_exists()
+        Customers.insert_many({'name': 'Ann'}, {'name': 'Bob'})
+        self.calls = []
+        batch_get = self.transport.batch_get
+        self.transport.batch_get = lambda ranges: self.calls.append(ranges) or batch_get(ranges)
+
+    def tearDown(self):
+        Customers.drop()
+        self.db.close()
+
+    def test_same_instance_within_scope(self):
+        self.assertIsNot(Customers.with_pk(1), Customers.with_pk(1))
+        with self.db.scope():
+            customer = Customers.with_pk(1)
+            self.calls.clear()
+            self.assertIs(Customers.with_pk(1), customer)
+            self.assertIs(Customers.with_pk('1'), customer)
+            self.assertListEqual(self.calls, [])
+            self.assertIs(Customers.get_table_records()[0], customer)
+            inserted = Customers.insert(name='Cid')
+            self.assertIs(Customers.with_pk(inserted.pk), inserted)
+        self.assertIsNot(Customers.with_pk(1), customer)
+
+    def test_consistent_with_writes(self):
+        with self.db.scope():
+            customer = Customers.with_pk(2)
+            Customers.update_with_pk(2, name='Bobby')
+            self.assertEqual(customer.name, 'Bobby')
+            Customers.update_with_index(2, id=5)
+            self.assertIs(Customers.with_pk(5), customer)
+            # Fields changed and not saved are kept on reads
+            customer.name = 'Robert'
+            Customers.get_table_records()
+            self.assertEqual(customer.name, 'Robert')
+            Customers.truncate()
+            self.assertIsNone(Customers.with_pk(5))
+
+    def test_per_thread(self):
+        self.db.identity_map_size = 10
+        first = Customers.with_pk(1)
+        self.assertIs(Customers.with_pk(1), first)
+        other = []
+        thread = Thread(target=lambda: other.append(Customers.with_pk(1)))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], first)
+
+    def test_weak_references_and_size(self):
+        identity_map = IdentityMap(size=1)
+        for pk in (1, 2):
+            identity_map.merge(Customers(id=pk, _index=pk))
+        gc.collect()
+        self.assertIsNone(identity_map.get(Customers, 1))
+        self.assertEqual(identity_map.get(Customers, 2).pk, 2)
+
+
+if __name__ == '__main__':
+    main()
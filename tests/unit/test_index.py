@@ -0,0 +1,48 @@
+from unittest import main, TestCase
+
+from google_sheets_db.index import HashIndex
+
+
+class HashIndexTests(TestCase):
+
+    def test_build_and_lookup(self):
+        index = HashIndex('email')
+        index.build(['a@example.com', '', 'b@example.com', 'a@example.com', None])
+        self.assertListEqual(index.lookup('a@example.com'), [1, 4])
+        self.assertListEqual(index.lookup('b@example.com'), [3])
+        self.assertListEqual(index.lookup('c@example.com'), [])
+        # Empty values are not indexed
+        self.assertListEqual(index.lookup(''), [])
+        self.assertEqual(len(index), 3)
+
+    def test_values_compared_as_strings(self):
+        index = HashIndex('external_id')
+        index.build(['1', '2'])
+        self.assertListEqual(index.lookup(2), [2])
+
+    def test_set_replaces_row_value(self):
+        index = HashIndex('email')
+        index.build(['a@example.com'])
+        index.set(1, 'b@example.com')
+        self.assertListEqual(index.lookup('a@example.com'), [])
+        self.assertListEqual(index.lookup('b@example.com'), [1])
+        index.set(2, 'a@example.com')
+        self.assertListEqual(index.lookup('a@example.com'), [2])
+
+    def test_check_unique(self):
+        index = HashIndex('email', unique=True)
+        index.build(['a@example.com', 'b@example.com'])
+        with self.assertRaisesRegex(Exception, 'Value of unique field email is not unique'):
+            index.check_unique('a@example.com')
+        # The row itself does not break uniqueness
+        index.check_unique('a@example.com', index=1)
+        index.check_unique('c@example.com')
+
+    def test_not_unique_index_does_not_check(self):
+        index = HashIndex('status')
+        index.build(['paid', 'paid'])
+        index.check_unique('paid')
+
+
+if __name__ == '__main__':
+    main()
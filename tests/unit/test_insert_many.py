@@ -0,0 +1,87 @@
+from unittest import main, TestCase
+
+from google_sheets_db import GoogleSheetsDB, BaseSheet, PrimaryKey, Field
+from google_sheets_db.transport import MemoryTransport
+
+
+class Orders(BaseSheet):
+    id = PrimaryKey()
+    number = Field(str, unique=True)
+    amount = int
+
+
+class ShardedOrders(BaseSheet):
+    id = PrimaryKey()
+    amount = int
+    meta = {'shards': ['Orders0', 'Orders1']}
+
+
+class InsertManyTests(TestCase):
+
+    def setUp(self):
+        self.transport = MemoryTransport()
+        self.db = GoogleSheetsDB('memory', transport=self.transport)
+        Orders.create_sheet_if_not_exists()
+        Orders.insert(id=2, number='A-2', amount=20)
+
+    def tearDown(self):
+        Orders.drop()
+        self.db.close()
+
+    def test_rows_of_any_kind(self):
+        orders = Orders.insert_many(
+            [None, 'A-1', 10],
+            {'number': 'A-3', 'amount': 30},
+            Orders(id=7, number='A-7', amount=70),
+        )
+        self.assertListEqual([(order.pk, order._index) for order in orders], [(1, 2), (3, 3), (7, 4)])
+        self.assertListEqual(Orders.get_table_values()[1:], [['1', 'A-1', '10'], ['3', 'A-3', '30'], ['7', 'A-7', '70']])
+        self.assertEqual(Orders.find_by(number='A-3')[0]._index, 3)
+
+    def test_chunks_are_written_concurrently(self):
+        calls = []
+        batch_update = self.transport.batch_update
+        self.transport.batch_update = lambda data: calls.append(data) or batch_update(data)
+        orders = Orders.insert_many([{'number': f'B-{i}', 'amount': i} for i in range(10)], chunk_size=3)
+        self.assertEqual(len(calls), 4)
+        self.assertListEqual(sorted(data[0]['range'] for data in calls),
+                             ["'Orders'!A11:D11", "'Orders'!A2:D4", "'Orders'!A5:D7", "'Orders'!A8:D10"])
+        self.assertListEqual([order._index for order in orders], list(range(2, 12)))
+        self.assertEqual(Orders.count(), 11)
+
+    def test_grid_is_grown(self):
+        self.transport.sheets['Orders'].row_count = 1
+        Orders.insert_many([{'number': f'C-{i}'} for i in range(5)])
+        self.assertEqual(self.transport.sheets['Orders'].row_count, 6)
+
+    def test_rows_without_key_are_kept(self):
+        # A row added by hand without a key ends the table
+        self.transport.batch_update([{'range': "'Orders'!B2:C2", 'values': [['hand-added', 5]]}])
+        order, = Orders.insert_many({'number': 'E-1'})
+        self.assertEqual(order._index, 3)
+        self.assertListEqual(Orders.get_table_values(), [['2', 'A-2', '20'], ['', 'hand-added', '5'], ['1', 'E-1', '0']])
+
+    def test_uniqueness(self):
+        with self.assertRaises(Exception):
+            Orders.insert_many({'id': 2, 'number': 'D-1'})
+        with self.assertRaises(Exception):
+            Orders.insert_many({'id': 5, 'number': 'D-1'}, {'id': 5, 'number': 'D-2'})
+        with self.assertRaises(Exception):
+            Orders.insert_many({'number': 'D-1'}, {'number': 'D-1'})
+        with self.assertRaises(Exception):
+            Orders.insert_many([1, 'D-1', 1, 'extra'])
+        self.assertEqual(Orders.count(), 1)
+
+    def test_sharded(self):
+        ShardedOrders.create_sheet_if_not_exists()
+        try:
+            orders = ShardedOrders.insert_many([{'amount': i} for i in range(6)])
+            self.assertListEqual([order.pk for order in orders], [1, 2, 3, 4, 5, 6])
+            self.assertListEqual([order.amount for order in orders], list(range(6)))
+            self.assertEqual(ShardedOrders.count(), 6)
+        finally:
+            ShardedOrders.drop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+from unittest import main, TestCase
+
+from google_sheets_db import GoogleSheetsDB, BaseSheet, PrimaryKey
+from google_sheets_db.journal import Journal
+from google_sheets_db.transport import MemoryTransport
+
+
+class Payments(BaseSheet):
+    id = PrimaryKey()
+    amount = int
+
+
+class QuotaError(Exception):
+    pass
+
+
+class JournalTests(TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'writes.wal')
+        self.transport = MemoryTransport()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def open_db(self) -> GoogleSheetsDB:
+        return GoogleSheetsDB('memory', transport=self.transport, journal=self.path)
+
+    def test_replay_resends_only_pending_writes(self):
+        db = self.open_db()
+        Payments.create_sheet_if_not_exists()
+        Payments.insert(amount=10)
+        batch_update = self.transport.batch_update
+
+        def fail(data):
+            raise QuotaError()
+        self.transport.batch_update = fail
+        with self.assertRaises(QuotaError):
+            Payments.insert(amount=20)
+        self.assertEqual(len(db.journal.pending()), 1)
+        db.close()
+
+        calls = []
+        self.transport.batch_update = lambda data: calls.append(data) or batch_update(data)
+        db = self.open_db()
+        try:
+            self.assertEqual(db.replay(), 1)
+            self.assertEqual(len(calls), 1)
+            self.assertListEqual(Payments.get_table_values(), [['1', '10'], ['2', '20']])
+            self.assertEqual(db.replay(), 0)
+        finally:
+            Payments.drop()
+            db.close()
+
+    def test_torn_line_is_ignored(self):
+        journal = Journal(self.path)
+        first = journal.record('clear', "'Payments'!A1:B2")
+        journal.record('clear', "'Payments'!A3:B4")
+        journal.ack(first)
+        journal._file.write('{"id": 3, "op": "cle')
+        journal._file.close()
+
+        journal = Journal(self.path)
+        self.assertListEqual([entry['id'] for entry in journal.pending()], [2])
+        self.assertEqual(journal.record('clear', "'Payments'!A5:B6"), 3)
+        journal.close()
+        with open(self.path) as file:
+            self.assertEqual(len(file.readlines()), 2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+import time
+from datetime import datetime
+from threading import Lock, Thread
+from unittest import main, TestCase
+from unittest.mock import patch
+
+from google_sheets_db import GoogleSheetsDB, LogSheet
+from google_sheets_db.transport import MemoryTransport
+
+
+class Events(LogSheet):
+    created_at = str
+    kind = str
+    payload = str
+    meta = {'timestamp_field': 'created_at', 'max_rows': 3}
+
+
+class LogSheetTests(TestCase):
+
+    def setUp(self):
+        self.transport = MemoryTransport()
+        self.db = GoogleSheetsDB('memory', transport=self.transport)
+        self.now = datetime(2026, 10, 19, 12, 0, 0)
+        patcher = patch.object(LogSheet, '_now', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        Events.drop()
+        self.db.close()
+
+    def test_append_without_reads(self):
+        calls = []
+        batch_get = self.transport.batch_get
+        self.transport.batch_get = lambda ranges: calls.append(ranges) or batch_get(ranges)
+        first, second = Events.append({'kind': 'login'}, ['2026-10-01T00:00:00', 'logout'])
+        event = Events.insert(kind='click', payload='{}')
+        self.assertListEqual(calls, [])
+
+        self.assertEqual(first.created_at, '2026-10-19T12:00:00')
+        self.assertEqual(second.created_at, '2026-10-01T00:00:00')
+        self.assertListEqual([first._index, second._index, event._index], [1, 2, 3])
+        self.assertListEqual(self.db.get_sheets_names(), ['Events_2026_10'])
+        self.assertListEqual([row[1] for row in Events.get_table_values()], ['login', 'logout', 'click'])
+
+    def test_identity_map(self):
+        # Rows without a primary key are not kept by the identity map
+        self.db.identity_map_size = 100
+        event, = Events.append({'kind': 'login'})
+        self.assertEqual(event.kind, 'login')
+        self.assertEqual(len(self.db.identity_map), 0)
+        self.assertIsNone(event.pk)
+        self.assertEqual(repr(Events.tail(1)), '[Events(None)]')
+
+    def test_rollover(self):
+        Events.append(*[{'kind': str(i)} for i in range(4)])
+        Events.append({'kind': '4'})
+        self.assertListEqual(self.db.get_sheets_names(), ['Events_2026_10', 'Events_2026_10_2'])
+        self.now = datetime(2026, 11, 1)
+        Events.append({'kind': '5'})
+        self.assertListEqual(self.db.get_sheets_names(), ['Events_2026_10', 'Events_2026_10_2', 'Events_2026_11'])
+
+        self.assertEqual(Events.count(), 6)
+        self.assertListEqual([record.kind for record in Events.get_table_records()], list('012345'))
+        self.assertListEqual(list(Events.get_frame()['kind']), list('012345'))
+        with self.assertRaises(Exception):
+            Events.update_with_index(1, kind='x')
+
+    def test_concurrent_appends(self):
+        Events.append({'kind': 'first'})
+        running = []
+        overlapped = []
+        lock = Lock()
+        append = self.transport.append
+
+        def slow_append(range_name, values):
+            with lock:
+                running.append(range_name)
+                overlapped.append(len(running) > 1)
+            time.sleep(0.05)
+            with lock:
+                running.remove(range_name)
+            return append(range_name, values)
+        self.transport.append = slow_append
+        threads = [Thread(target=Events.append, args=({'kind': str(i)},)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Appends are sent at once, rows in flight still roll the worksheet over
+        self.assertTrue(any(overlapped))
+        self.assertEqual(Events.count(), 5)
+        self.assertListEqual(self.db.get_sheets_names(), ['Events_2026_10', 'Events_2026_10_2'])
+
+    def test_tail(self):
+        Events.append(*[{'kind': str(i)} for i in range(4)])
+        Events.append(*[{'kind': str(i)} for i in range(4, 6)])
+        calls = []
+        batch_get = self.transport.batch_get
+        self.transport.batch_get = lambda ranges: calls.append(ranges) or batch_get(ranges)
+        self.assertListEqual([record.kind for record in Events.tail(2)], ['4', '5'])
+        self.assertEqual(len(calls), 1)
+        tail = Events.tail(4)
+        self.assertListEqual([record.kind for record in tail], ['2', '3', '4', '5'])
+        self.assertListEqual([record._index for record in tail], [3, 4, 1, 2])
+        self.assertListEqual([record.kind for record in Events.tail(10)], list('012345'))
+
+        # Rows appended by others are read too
+        self.transport.append("'Events_2026_10_2'!A1:C", [['2026-10-19T12:00:01', '6', '']])
+        self.assertListEqual([record.kind for record in Events.tail(2)], ['5', '6'])
+
+    def test_since(self):
+        self.now = datetime(2026, 9, 30, 23, 0)
+        Events.append({'kind': 'old'})
+        self.now = datetime(2026, 10, 2, 10, 0)
+        Events.append({'kind': 'a'}, {'kind': 'b'})
+        self.now = datetime(2026, 10, 3, 10, 0)
+        Events.append({'kind': 'c'})
+
+        calls = []
+        batch_get = self.transport.batch_get
+        self.transport.batch_get = lambda ranges: calls.append(ranges) or batch_get(ranges)
+        self.assertListEqual([record.kind for record in Events.since('2026-10-03T00:00:00')], ['c'])
+        self.assertTrue(all('2026_09' not in range_name for ranges in calls for range_name in ranges))
+        self.assertListEqual([record.kind for record in Events.since(datetime(2026, 9, 1))], ['old', 'a', 'b', 'c'])
+
+
+if __name__ == '__main__':
+    main()
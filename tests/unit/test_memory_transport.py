@@ -0,0 +1,123 @@
+from unittest import main, TestCase
+
+from google_sheets_db import GoogleSheetsDB, BaseSheet, PrimaryKey, Field
+from google_sheets_db.transport import MemoryTransport, split_range
+
+
+class Users(BaseSheet):
+    meta = {
+        'start_row': 2,
+        'start_column': 2,
+    }
+    id = PrimaryKey()
+    email = Field(str, unique=True)
+    name = str
+
+
+class Counters(BaseSheet):
+    id = PrimaryKey()
+    amount = Field(int)
+
+
+class MemoryTransportTests(TestCase):
+    unformatted = False
+
+    def setUp(self):
+        self.transport = MemoryTransport(unformatted=self.unformatted)
+        self.db = GoogleSheetsDB('memory', transport=self.transport)
+        Users.create_sheet_if_not_exists()
+
+    def tearDown(self):
+        Users.drop()
+        if Counters.exists():
+            Counters.drop()
+        self.db.close()
+
+    def test_split_range(self):
+        self.assertEqual(split_range("'Sheet''1'!A1:B2"), ("Sheet'1", 'A1:B2'))
+        self.assertEqual(split_range("'Sheet1'"), ('Sheet1', None))
+        self.assertEqual(split_range("Sheet1!C"), ('Sheet1', 'C'))
+
+    def test_ranges(self):
+        self.transport.batch_update([{'range': "'Users'!A1:C2", 'values': [[1, 'a', None], [2, '', True]]}])
+        self.assertListEqual(self.transport.batch_get(["'Users'!A1:C2", "'Users'!B:B", "'Users'!D5"]),
+                             [[['1', 'a'], ['2', '', 'TRUE']], [['a']], []])
+        self.transport.clear("'Users'!B1:C2")
+        self.assertListEqual(self.transport.batch_get(["'Users'"]), [[['1'], ['2']]])
+
+    def test_metadata(self):
+        self.assertTrue(Users.exists())
+        self.assertListEqual(self.db.get_sheets_names(), ['Users'])
+        self.assertEqual(self.db.get_sheet_by_name('Users').row_count, 100)
+
+    def test_insert_and_read(self):
+        first = Users.insert(email='a@example.com', name='A')
+        second = Users.insert(email='b@example.com', name='B')
+        self.assertEqual((first.pk, first._index), (1, 1))
+        self.assertEqual((second.pk, second._index), (2, 2))
+        # Table starts at B2
+        self.assertListEqual(self.transport.sheets['Users'].values[1], [None, 1, 'a@example.com', 'A'])
+        self.assertEqual(Users.with_pk(2).email, 'b@example.com')
+        self.assertListEqual([user.name for user in Users.get_table_records()], ['A', 'B'])
+        self.assertEqual(Users.count(), 2)
+
+    def test_save_writes_changed_cells(self):
+        user = Users(email='a@example.com', name='A').save()
+        self.assertEqual(user.pk, 1)
+        self.assertEqual(user._index, 1)
+        user = Users.with_pk(1)
+        user.name = 'Changed'
+        writes = []
+        batch_update = self.transport.batch_update
+        self.transport.batch_update = lambda data: writes.append(data) or batch_update(data)
+        user.save()
+        self.assertListEqual(writes, [[{'range': "'Users'!D2:D2", 'values': [['Changed']]}]])
+        self.assertEqual(Users.with_pk(1).name, 'Changed')
+
+    def test_find_by_and_unique(self):
+        Users.insert(email='a@example.com', name='A')
+        Users.insert(email='b@example.com', name='B')
+        self.assertListEqual([user.name for user in Users.find_by(email='b@example.com')], ['B'])
+        with self.assertRaisesRegex(Exception, 'Value of unique field email is not unique'):
+            Users.insert(email='a@example.com', name='C')
+        Users.update_with_pk(2, email='c@example.com')
+        self.assertListEqual(Users.find_by(email='b@example.com'), [])
+        self.assertListEqual([str(user.pk) for user in Users.find_by(email='c@example.com')], ['2'])
+
+    def test_update_or_insert(self):
+        Users.insert(email='a@example.com', name='A')
+        Users.update_or_insert({'email': 'a@example.com'}, update={'name': 'Changed'})
+        Users.update_or_insert({'name': 'B'}, update={'email': 'b@example.com'})
+        self.assertListEqual([(user.email, user.name) for user in Users.get_table_records()],
+                             [('a@example.com', 'Changed'), ('b@example.com', 'B')])
+
+    def test_keys_of_any_type(self):
+        Counters.create_sheet_if_not_exists()
+        Counters.insert(amount=5)
+        self.assertEqual(str(Counters.with_pk('1').amount), '5')
+        with self.assertRaisesRegex(Exception, 'Primary key is not unique'):
+            Counters.insert('1', 7, generate_pk=False)
+        Counters.update_or_insert({'amount': 5}, update={'amount': 6})
+        Counters.update_or_insert({'amount': '6'}, update={'amount': 7})
+        self.assertListEqual([(str(counter.pk), str(counter.amount)) for counter in Counters.get_table_records()],
+                             [('1', '7')])
+
+    def test_truncate(self):
+        Users.insert(email='a@example.com', name='A')
+        Users.truncate()
+        self.assertEqual(Users.count(), 0)
+        Users.insert(email='a@example.com', name='A')
+
+
+
+class UnformattedMemoryTransportTests(MemoryTransportTests):
+    """Models over a transport returning numbers and booleans as native types, like the values one"""
+    unformatted = True
+
+    def test_ranges(self):
+        self.transport.batch_update([{'range': "'Users'!A1:C2", 'values': [[1, 'a', None], [2, '', True]]}])
+        self.assertListEqual(self.transport.batch_get(["'Users'!A1:C2"]), [[[1, 'a'], [2, '', True]]])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+import time
+from threading import Lock
+from unittest import main, TestCase
+
+from google_sheets_db import GoogleSheetsDB, BaseSheet, PrimaryKey
+from google_sheets_db.concurrency import MAX_WORKERS, RateLimiter, run_parallel
+from google_sheets_db.transport import MemoryTransport
+
+
+class Measurements(BaseSheet):
+    id = PrimaryKey()
+    value = str
+
+
+class ParallelScanTests(TestCase):
+
+    def setUp(self):
+        self.transport = MemoryTransport()
+        self.db = GoogleSheetsDB('memory', transport=self.transport)
+        Measurements.create_sheet_if_not_exists()
+        Measurements.insert_many(*[{'value': f'v{i}'} for i in range(1, 101)])
+        # Empty rows in the middle of the table
+        self.transport.clear("'Measurements'!A40:B55")
+        self.calls = []
+        batch_get = self.transport.batch_get
+        self.transport.batch_get = lambda ranges: self.calls.append(ranges) or batch_get(ranges)
+
+    def tearDown(self):
+        Measurements.drop()
+        self.db.close()
+
+    def test_same_as_single_read(self):
+        values = Measurements.get_table_values()
+        self.calls.clear()
+        self.assertListEqual(Measurements.get_table_values(parallel=7), values)
+        self.assertEqual(len(self.calls), 7)
+        records = Measurements.get_table_records(parallel=4)
+        self.assertListEqual([record._index for record in records], list(range(1, 101)))
+        self.assertListEqual([record.values() for record in records],
+                             [record.values() for record in Measurements.get_table_records()])
+        frame = Measurements.get_frame(parallel=3)
+        self.assertListEqual(list(frame.columns), ['id', 'value'])
+        self.assertEqual(len(frame), 100)
+        self.assertEqual(frame.loc[100, 'value'], 'v100')
+        self.assertTrue(frame.loc[45].isna().all())
+
+    def test_rows_beyond_cached_grid(self):
+        sheet = self.transport.sheets['Measurements']
+        sheet.row_count = 50
+        self.assertEqual(len(Measurements.get_table_values(parallel=4)), 100)
+        # Grid is much larger than the table
+        sheet.row_count = 1000
+        self.assertEqual(len(Measurements.get_table_values(parallel=4)), 100)
+
+    def test_pool_is_bounded(self):
+        lock, running, peak = Lock(), [0], [0]
+
+        def work(item):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+            return item
+
+        self.assertListEqual(run_parallel(work, range(40)), list(range(40)))
+        self.assertLessEqual(peak[0], MAX_WORKERS)
+
+    def test_rate_limit(self):
+        limiter = RateLimiter(2, period=0.2)
+        started = time.monotonic()
+        for i in range(3):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+
+
+if __name__ == '__main__':
+    main()
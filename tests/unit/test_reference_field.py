@@ -0,0 +1,79 @@
+from unittest import main, TestCase
+
+from google_sheets_db import GoogleSheetsDB, BaseSheet, PrimaryKey, ReferenceField
+from google_sheets_db import base_sheet
+from google_sheets_db.transport import MemoryTransport
+
+
+class Customers(BaseSheet):
+    id = PrimaryKey()
+    name = str
+
+
+class Orders(BaseSheet):
+    id = PrimaryKey()
+    customer = ReferenceField(Customers)
+    amount = int
+
+
+class ReferenceFieldTests(TestCase):
+
+    def setUp(self):
+        self.transport = MemoryTransport()
+        self.db = GoogleSheetsDB('memory', transport=self.transport)
+        Customers.create_sheet_if_not_exists()
+        Orders.create_sheet_if_not_exists()
+        Customers.insert_many(*[{'name': f'Customer {i}'} for i in range(1, 6)])
+        Orders.insert_many(*[{'customer': i % 3 + 1, 'amount': i} for i in range(30)], {'amount': 100})
+        self.calls = []
+        batch_get = self.transport.batch_get
+        self.transport.batch_get = lambda ranges: self.calls.append(ranges) or batch_get(ranges)
+
+    def tearDown(self):
+        Orders.drop()
+        Customers.drop()
+        self.db.close()
+
+    def test_prefetch(self):
+        orders = Orders.get_table_records(prefetch=['customer'])
+        # Orders, customers keys and the referenced rows
+        self.assertEqual(len(self.calls), 3)
+        self.assertEqual(len(self.calls[-1]), 3)
+        self.assertEqual(orders[4].related('customer').name, 'Customer 2')
+        self.assertIs(orders[1].related('customer'), orders[4].related('customer'))
+        self.assertIsNone(orders[-1].related('customer'))
+        self.assertEqual(len(self.calls), 3)
+
+    def test_whole_table_is_read_for_many_keys(self):
+        limit = base_sheet.PREFETCH_ROWS
+        base_sheet.PREFETCH_ROWS = 2
+        try:
+            orders = Orders.get_table_records(prefetch=['customer'])
+        finally:
+            base_sheet.PREFETCH_ROWS = limit
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(orders[0].related('customer').name, 'Customer 1')
+
+    def test_lazy_related(self):
+        order = Orders.with_pk(3)
+        self.assertEqual(order.related('customer').name, 'Customer 3')
+        order.customer = 5
+        self.assertEqual(order.related('customer').name, 'Customer 5')
+        with self.assertRaises(Exception):
+            order.related('amount')
+
+    def test_related_after_library_writes(self):
+        with self.db.scope():
+            order = Orders.with_pk(1)
+            self.assertEqual(order.related('customer').name, 'Customer 1')
+            Orders.update_with_pk(1, customer=2)
+            self.assertEqual(order.customer, 2)
+            self.assertEqual(order.related('customer').name, 'Customer 2')
+            # Values of a repeated read are merged into the kept instance
+            self.transport.batch_update([{'range': "'Orders'!B1", 'values': [[3]]}])
+            self.assertIs(Orders.get_table_records()[0], order)
+            self.assertEqual(order.related('customer').name, 'Customer 3')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+from unittest import main, TestCase
+
+from google_sheets_db import BaseSheet, PrimaryKey
+from google_sheets_db.sharding import HashPartitioner, RangePartitioner
+
+
+class Orders(BaseSheet):
+    meta = {
+        'sheet_name': 'Orders',
+        'start_row': 2,
+        'shards': ['Orders_1', {'spreadsheet_id': 'another', 'sheet_name': 'Orders_2'}, {'spreadsheet_id': 'third'}],
+    }
+    id = PrimaryKey()
+    amount = int
+
+
+class RangeOrders(BaseSheet):
+    meta = {
+        'shards': ['Orders_1', 'Orders_2'],
+        'partitioner': RangePartitioner([1000]),
+    }
+    id = PrimaryKey()
+    amount = int
+
+
+class ShardingTests(TestCase):
+
+    def test_hash_partitioner_is_stable(self):
+        partitioner = HashPartitioner()
+        self.assertEqual(partitioner.shard_for(5, 3), partitioner.shard_for('5', 3))
+        self.assertIn(partitioner.shard_for('key', 3), range(3))
+
+    def test_range_partitioner(self):
+        partitioner = RangePartitioner([2000, 1000])
+        self.assertEqual(partitioner.shard_for(1, 3), 0)
+        self.assertEqual(partitioner.shard_for('1000', 3), 1)
+        self.assertEqual(partitioner.shard_for(5000, 3), 2)
+        with self.assertRaisesRegex(Exception, 'needs 3 shards, got 2'):
+            partitioner.shard_for(1, 2)
+
+    def test_shards(self):
+        shards = Orders._shards
+        self.assertEqual(len(shards), 3)
+        self.assertListEqual([shard._sheet_name for shard in shards], ['Orders_1', 'Orders_2', 'Orders'])
+        self.assertListEqual([shard.meta.get('spreadsheet_id') for shard in shards], [None, 'another', 'third'])
+        for shard in shards:
+            self.assertTrue(issubclass(shard, Orders))
+            self.assertEqual(shard._sheet_start_row, 2)
+            self.assertListEqual([f.name for f in shard._columns], ['id', 'amount'])
+            self.assertListEqual(shard._shards, [])
+        self.assertListEqual(Orders.meta['shards'][:1], ['Orders_1'])
+
+    def test_shard_for(self):
+        self.assertIs(RangeOrders._shard_for(10), RangeOrders._shards[0])
+        self.assertIs(RangeOrders._shard_for('1500'), RangeOrders._shards[1])
+        with self.assertRaisesRegex(Exception, 'Primary key is required'):
+            RangeOrders._shard_for(None)
+
+    def test_not_sharded(self):
+        class Plain(BaseSheet):
+            id = PrimaryKey()
+
+        self.assertListEqual(Plain._shards, [])
+
+
+if __name__ == '__main__':
+    main()
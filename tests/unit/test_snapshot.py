@@ -0,0 +1,121 @@
+import os
+from datetime import datetime
+from tempfile import TemporaryDirectory
+from unittest import main, TestCase, skipIf
+
+from google_sheets_db import GoogleSheetsDB, BaseSheet, PrimaryKey, Field
+from google_sheets_db.transport import MemoryTransport
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+class Payments(BaseSheet):
+    id = PrimaryKey()
+    amount = Field(float)
+    paid = Field(bool)
+    comment = str
+
+
+class Visits(BaseSheet):
+    id = PrimaryKey()
+    visits = int
+    at = Field(datetime, default=None)
+
+
+class GridTransport(MemoryTransport):
+    """Rejects writes past the grid like the API does"""
+
+    def batch_update(self, data):
+        for item in data:
+            sheet, first_row, _, _, _ = self._locate(item['range'])
+            if first_row + len(item['values']) - 1 > sheet.row_count:
+                raise Exception(f"Range {item['range']} exceeds grid limits.")
+        return super().batch_update(data)
+
+
+class SnapshotTests(TestCase):
+
+    def setUp(self):
+        self.db = GoogleSheetsDB('memory', transport=MemoryTransport())
+        Payments.create_sheet_if_not_exists()
+        Payments.insert(amount=10.5, paid=True, comment='first')
+        Payments.insert(amount=3, paid=False, comment='')
+        self.directory = TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+        Payments.drop()
+        self.db.close()
+
+    def round_trip(self, file_name):
+        path = os.path.join(self.directory.name, file_name)
+        self.assertEqual(Payments.export(path, chunk_size=1), 2)
+        self.assertEqual(Payments.load(path, truncate=True, chunk_size=1), 2)
+        return path
+
+    def test_csv(self):
+        self.round_trip('payments.csv')
+        self.assertListEqual(Payments.get_table_values(), [['1', '10.5', 'TRUE', 'first'], ['2', '3.0', 'FALSE']])
+
+    @skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_parquet(self):
+        path = self.round_trip('payments.parquet')
+        table = pyarrow.parquet.read_table(path)
+        self.assertEqual(str(table.schema.field('id').type), 'int64')
+        self.assertEqual(str(table.schema.field('paid').type), 'bool')
+        self.assertListEqual(table.column('amount').to_pylist(), [10.5, 3.0])
+        self.assertListEqual(Payments.get_table_values(), [['1', '10.5', 'TRUE', 'first'], ['2', '3.0', 'FALSE']])
+
+    @skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_arrow_append(self):
+        path = os.path.join(self.directory.name, 'payments.arrow')
+        Payments.export(path)
+        self.assertEqual(Payments.load(path), 2)
+        self.assertEqual(Payments.count(), 4)
+
+    def test_formatted_and_unknown_types(self):
+        Visits.create_sheet_if_not_exists()
+        try:
+            Visits.insert(visits='1,200', at='2026-10-01 10:00:00')
+            path = os.path.join(self.directory.name, 'visits.csv')
+            self.assertEqual(Visits.export(path), 1)
+            with open(path) as file:
+                self.assertIn('1,1200,2026-10-01 10:00:00', file.read())
+            if pyarrow is not None:
+                path = os.path.join(self.directory.name, 'visits.parquet')
+                Visits.export(path)
+                table = pyarrow.parquet.read_table(path)
+                self.assertListEqual(table.column('visits').to_pylist(), [1200])
+                self.assertListEqual(table.column('at').to_pylist(), ['2026-10-01 10:00:00'])
+        finally:
+            Visits.drop()
+
+    def test_load_grows_grid(self):
+        path = os.path.join(self.directory.name, 'payments.csv')
+        Payments.export(path)
+        transport = GridTransport()
+        self.db.close()
+        self.db = GoogleSheetsDB('memory', transport=transport)
+        transport.add_worksheet('Payments', rows=1, cols=4)
+        self.assertEqual(Payments.load(path), 2)
+        self.assertEqual(transport.sheets['Payments'].row_count, 2)
+        self.assertEqual(Payments.count(), 2)
+
+    def test_export_reads_rows_past_cached_grid(self):
+        transport = self.db.transport
+        transport.batch_update([{'range': "'Payments'!A150:B150", 'values': [[3, 1]]}])
+        # The row was added by others without growing the known grid
+        transport.sheets['Payments'].row_count = 100
+        path = os.path.join(self.directory.name, 'payments.csv')
+        self.assertEqual(Payments.export(path, chunk_size=50), 3)
+
+    def test_unknown_format(self):
+        with self.assertRaisesRegex(Exception, 'Unknown snapshot format: xls'):
+            Payments.export('payments.xls', format='xls')
+
+
+if __name__ == '__main__':
+    main()
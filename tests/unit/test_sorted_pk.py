@@ -0,0 +1,70 @@
+from unittest import main, TestCase
+
+from google_sheets_db import GoogleSheetsDB, BaseSheet, PrimaryKey
+from google_sheets_db.transport import MemoryTransport
+
+
+class Events(BaseSheet):
+    id = PrimaryKey()
+    name = str
+    meta = {'sorted_by_pk': True}
+
+
+class SortedPrimaryKeyTests(TestCase):
+
+    def setUp(self):
+        self.transport = MemoryTransport()
+        self.db = GoogleSheetsDB('memory', transport=self.transport)
+        Events.create_sheet_if_not_exists()
+        # Keys with gaps, sorted
+        Events.insert_many(*[[i * 3, f'event {i}'] for i in range(1, 1001)])
+        self.calls = []
+        batch_get = self.transport.batch_get
+        self.transport.batch_get = lambda ranges: self.calls.append(ranges) or batch_get(ranges)
+
+    def tearDown(self):
+        Events.drop()
+        self.db.close()
+
+    def test_lookup(self):
+        for pk in (3, 6, 1500, 2997, 3000):
+            self.assertEqual(Events.get_row_index_for_pk(pk), pk // 3)
+        for pk in (1, 1501, 3001, ''):
+            self.assertIsNone(Events.get_row_index_for_pk(pk))
+        self.assertEqual(Events.with_pk('900').name, 'event 300')
+
+    def test_probes_are_small(self):
+        self.assertEqual(Events.get_row_index_for_pk(2002), None)
+        self.assertLessEqual(len(self.calls), 4)
+        # Every request reads a handful of single cells or a short window, not the whole column
+        self.assertTrue(all(len(ranges) <= 16 for ranges in self.calls))
+        self.assertTrue(all(':' not in ranges[0] for ranges in self.calls[:-1]))
+
+    def test_rows_past_cached_grid(self):
+        # Rows were appended by others after the grid size was cached
+        self.transport.sheets['Events'].row_count = 500
+        self.assertEqual(Events.get_row_index_for_pk(2400), 800)
+        self.assertEqual(Events.get_row_index_for_pk(300), 100)
+        self.assertIsNone(Events.get_row_index_for_pk(3001))
+
+    def test_probes_validation(self):
+        for probes in (1, 2):
+            Events.meta['pk_probes'] = probes
+            try:
+                with self.assertRaisesRegex(Exception, 'pk_probes must be at least 3'):
+                    Events.get_row_index_for_pk(3)
+            finally:
+                Events.meta.pop('pk_probes')
+        Events.meta['pk_probes'] = 3
+        try:
+            self.assertEqual(Events.get_row_index_for_pk(2997), 999)
+        finally:
+            Events.meta.pop('pk_probes')
+
+    def test_update(self):
+        Events.update_with_pk(2100, name='renamed')
+        self.assertListEqual(Events.get_table_values()[699], ['2100', 'renamed'])
+
+
+if __name__ == '__main__':
+    main()
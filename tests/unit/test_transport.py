@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+from unittest import main, TestCase
+
+from gspread.models import Worksheet
+
+from google_sheets_db.transport import GspreadTransport, ValuesApiTransport
+
+
+class FakeClient:
+
+    def __init__(self, response):
+        self.response = response
+        self.requests = []
+
+    def request(self, method, url, params=None, json=None, headers=None):
+        self.requests.append({'method': method, 'url': url, 'params': params, 'json': json, 'headers': headers})
+        return SimpleNamespace(json=lambda: self.response)
+
+
+class ValuesApiTransportTests(TestCase):
+
+    def setUp(self):
+        self.client = FakeClient({'valueRanges': [{'values': [[1, True]]}, {}]})
+        self.transport = ValuesApiTransport()
+        self.transport.bind(SimpleNamespace(spreadsheet_id='id', spreadsheet=SimpleNamespace(client=self.client)))
+
+    def test_batch_get(self):
+        values = self.transport.batch_get(["'Sheet1'!A1:B1", "'Sheet1'!C1", "'Sheet1'!D1"])
+        # Native values are returned, missing ranges are empty
+        self.assertListEqual(values, [[[1, True]], [], []])
+        request = self.client.requests[0]
+        self.assertEqual(request['url'], 'https://sheets.googleapis.com/v4/spreadsheets/id/values:batchGet')
+        self.assertIn(('valueRenderOption', 'UNFORMATTED_VALUE'), request['params'])
+        self.assertIn(('fields', 'valueRanges(values)'), request['params'])
+        self.assertEqual(request['headers']['Accept-Encoding'], 'gzip')
+
+    def test_batch_update(self):
+        self.transport.batch_update([{'range': "'Sheet1'!A1", 'values': [[1]]}])
+        request = self.client.requests[0]
+        self.assertEqual(request['method'], 'post')
+        self.assertEqual(request['json']['valueInputOption'], 'RAW')
+        self.assertDictEqual(request['params'], {'fields': 'totalUpdatedCells'})
+
+
+class GspreadTransportTests(TestCase):
+
+    def test_add_rows(self):
+        requests = []
+        spreadsheet = SimpleNamespace(client=None, batch_update=lambda body: requests.append(body) or {})
+        worksheet = Worksheet(spreadsheet, {'sheetId': 7, 'title': 'Sheet1', 'index': 0,
+                                            'gridProperties': {'rowCount': 100, 'columnCount': 5}})
+        transport = GspreadTransport()
+        transport.bind(SimpleNamespace(spreadsheet=spreadsheet))
+        transport.add_rows(worksheet, 60)
+        # The grid is grown relatively, so rows added by others are kept
+        self.assertDictEqual(requests[0]['requests'][0]['appendDimension'],
+                             {'sheetId': 7, 'dimension': 'ROWS', 'length': 60})
+        self.assertEqual(worksheet.row_count, 160)
+
+
+if __name__ == '__main__':
+    main()
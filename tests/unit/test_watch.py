@@ -0,0 +1,87 @@
+from unittest import main, TestCase
+
+from google_sheets_db import GoogleSheetsDB, BaseSheet, PrimaryKey
+from google_sheets_db.transport import MemoryTransport
+
+
+class Tasks(BaseSheet):
+    id = PrimaryKey()
+    status = str
+
+
+class WatchTests(TestCase):
+
+    def setUp(self):
+        self.transport = MemoryTransport()
+        self.db = GoogleSheetsDB('memory', transport=self.transport)
+        Tasks.create_sheet_if_not_exists()
+        Tasks.insert(status='new')
+        Tasks.insert(status='new')
+        self.changes = []
+        self.watcher = Tasks.watch(interval=0.01, on_change=self.changes.append)
+
+    def tearDown(self):
+        self.watcher.stop()
+        Tasks.drop()
+        self.db.close()
+
+    def edit(self, range_name, values):
+        """Edits the sheet bypassing the library like a person would"""
+        self.transport.batch_update([{'range': f"'Tasks'!{range_name}", 'values': values}])
+
+    def test_changes(self):
+        self.watcher.stop()
+        self.assertIsNone(Tasks._watcher)
+        self.watcher.refresh()
+        self.edit('B1', [['done']])
+        self.edit('A3:B3', [[3, 'new']])
+        changes = self.watcher.refresh()
+        self.assertListEqual([task.pk for task in changes.inserted], ['3'])
+        self.assertListEqual([(task.pk, task.status) for task in changes.updated], [('1', 'done')])
+        self.assertListEqual(changes.deleted, [])
+        self.transport.clear("'Tasks'!A2:B2")
+        changes = self.watcher.refresh()
+        self.assertListEqual([task.pk for task in changes.deleted], ['2'])
+        self.assertFalse(self.watcher.refresh())
+        self.assertEqual(len(self.changes), 2)
+        self.assertIs(next(iter(self.watcher)), self.changes[0])
+
+    def test_background_refresh(self):
+        self.edit('B2', [['done']])
+        changes = next(iter(self.watcher))
+        self.assertListEqual([task.pk for task in changes.updated], ['2'])
+
+    def test_bounded_staleness(self):
+        self.watcher.stop()
+        watcher = Tasks.watch(interval=60)
+        self.watcher = watcher
+        records = Tasks.get_table_records(max_staleness=60)
+        self.assertEqual(len(records), 2)
+        # Edits made by others are not visible within the staleness
+        self.edit('A3:B3', [[3, 'new']])
+        self.assertEqual(len(Tasks.get_table_records(max_staleness=60)), 2)
+        self.assertEqual(len(Tasks.get_table_records(max_staleness=0)), 3)
+        # Writes of the library are visible right away
+        Tasks.insert(status='new')
+        self.assertEqual(len(Tasks.get_table_records(max_staleness=60)), 4)
+
+    def test_kept_rows_are_not_shared(self):
+        self.watcher.stop()
+        self.watcher = Tasks.watch(interval=60)
+        first = Tasks.get_table_records(max_staleness=60)
+        first[0].status = 'mutated'
+        second = Tasks.get_table_records(max_staleness=60)
+        self.assertIsNot(second[0], first[0])
+        self.assertEqual(second[0].status, 'new')
+
+    def test_insert_rows_resets_indexes(self):
+        self.watcher.stop()
+        with self.db.scope():
+            self.assertEqual(Tasks.with_pk(1)._index, 1)
+            Tasks.insert_rows([[9, 'inserted']], 1)
+            self.assertEqual(Tasks.with_pk(1)._index, 2)
+            self.assertEqual(Tasks.with_pk(9)._index, 1)
+
+
+if __name__ == '__main__':
+    main()